@@ -19,9 +19,12 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 RAW_DATA_DIR = os.path.join(DATA_DIR, "raw")
 PROCESSED_DATA_DIR = os.path.join(DATA_DIR, "processed")
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+PLOT_CACHE_DIR = os.path.join(CACHE_DIR, "plots")
+EMAIL_SPOOL_DIR = os.path.join(os.path.dirname(__file__), "spool")
 
 # Ensure directories exist
-for directory in [RAW_DATA_DIR, PROCESSED_DATA_DIR, MODEL_DIR]:
+for directory in [RAW_DATA_DIR, PROCESSED_DATA_DIR, MODEL_DIR, CACHE_DIR]:
     os.makedirs(directory, exist_ok=True)
 
 # Database configuration
@@ -33,6 +36,29 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "password")
 }
 
+# Dashboard factor analysis rendering: above scatter_max_points rows, numeric
+# factors are drawn as a 2-D density ("density") or a downsampled WebGL scatter ("webgl")
+FACTOR_PLOT_SETTINGS = {
+    "scatter_max_points": int(os.getenv("FACTOR_SCATTER_MAX_POINTS", 20000)),
+    "large_mode": os.getenv("FACTOR_LARGE_MODE", "density"),
+    "density_bins": int(os.getenv("FACTOR_DENSITY_BINS", 40)),
+    "webgl_sample_size": int(os.getenv("FACTOR_WEBGL_SAMPLE_SIZE", 10000))
+}
+
+# Email delivery configuration
+SMTP_CONFIG = {
+    "host": os.getenv("SMTP_HOST", "localhost"),
+    "port": int(os.getenv("SMTP_PORT", 25)),
+    "user": os.getenv("SMTP_USER", ""),
+    "password": os.getenv("SMTP_PASSWORD", ""),
+    "use_tls": os.getenv("SMTP_USE_TLS", "0") == "1",
+    "sender": os.getenv("SMTP_SENDER", "reports@edu-analytics.local"),
+    "max_workers": int(os.getenv("SMTP_MAX_WORKERS", 4)),
+    "max_retries": int(os.getenv("SMTP_MAX_RETRIES", 3)),
+    # Seconds a claimed message stays with its worker before another run may take it back
+    "inflight_lease": int(os.getenv("SMTP_INFLIGHT_LEASE", 600))
+}
+
 # Model parameters
 MODEL_PARAMS = {
     "random_forest": {
@@ -6,16 +6,22 @@ Created on Fri May  9 06:33:54 2025
 """
 
 # dashboard/app.py
+import time
+IMPORT_STARTED = time.perf_counter()
+
+import io
 import os
+import itertools
+import base64
 import sys
 import pandas as pd
 import dash
+import flask
 from dash import dcc, html, Input, Output, State, dash_table
 import plotly.express as px
 import plotly.graph_objects as go
-import plotly.figure_factory as ff
+from plotly.subplots import make_subplots
 import numpy as np
-import pickle
 from datetime import datetime, timezone, UTC  # Import UTC for timezone-aware dates
 import atexit
 import traceback  # Added for better error logging
@@ -24,94 +30,28 @@ import traceback  # Added for better error logging
 try:
     # Try the relative path approach first
     sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-    from config import PROCESSED_DATA_DIR, MODEL_DIR
+    from config import PROCESSED_DATA_DIR, MODEL_DIR, FACTOR_PLOT_SETTINGS
 except (ImportError, ModuleNotFoundError):
     # Fall back to a simple local config
     print("Using local configuration")
     PROCESSED_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
     MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models')
+    FACTOR_PLOT_SETTINGS = {"scatter_max_points": 20000, "large_mode": "density",
+                            "density_bins": 40, "webgl_sample_size": 10000}
     os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
     os.makedirs(MODEL_DIR, exist_ok=True)
 
-# Load data and models
-def load_data():
-    """Load processed data for dashboard with fallback"""
-    try:
-        # Try to load data from the expected path
-        jamb_data = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'jamb_enhanced.csv'))
-        print("Successfully loaded real data")
-        return jamb_data
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        # Return sample data for demonstration when deployed
-        print("Using sample data for deployment")
-        # Create sample data
-        np.random.seed(42)
-        sample_data = {
-            'JAMB_Score': np.random.normal(220, 40, 1000).clip(120, 350),
-            'Study_Hours_Per_Week': np.random.normal(15, 8, 1000).clip(0, 40),
-            'Teacher_Quality': np.random.choice([1, 2, 3, 4, 5], 1000),
-            'Attendance_Rate': np.random.normal(80, 15, 1000).clip(40, 100),
-            'Distance_To_School': np.random.exponential(5, 1000).clip(0.1, 20),
-            'School_Type': np.random.choice(['Public', 'Private'], 1000),
-            'School_Location': np.random.choice(['Urban', 'Rural'], 1000),
-            'Extra_Tutorials': np.random.choice(['Yes', 'No'], 1000),
-            'Access_To_Learning_Materials': np.random.choice(['Yes', 'No'], 1000),
-            'Parent_Involvement': np.random.choice(['Low', 'Medium', 'High'], 1000),
-            'IT_Knowledge': np.random.choice(['Low', 'Medium', 'High'], 1000)
-        }
-        return pd.DataFrame(sample_data)
-
-def load_models():
-    """Load trained models with fallback options"""
-    models = {}
-    try:
-        for model_name in ["jamb_score_regressor", "jamb_pass_classifier", "jamb_xgb_regressor"]:
-            model_path = os.path.join(MODEL_DIR, f"{model_name}.pkl")
-            with open(model_path, 'rb') as f:
-                models[model_name] = pickle.load(f)
-        print("Successfully loaded real models")
-        return models
-    except Exception as e:
-        print(f"Error loading models: {e}")
-        print("Using simple models for deployment")
-        
-        # Create simple fallback models
-        from sklearn.linear_model import LinearRegression
-        from sklearn.dummy import DummyClassifier
-        
-        # Simple linear regression model
-        lr = LinearRegression()
-        lr.coef_ = np.array([2.5, 10.0, 0.5, -2.0, 5.0])  # Study, Teacher, Attendance, Distance, (constant)
-        lr.intercept_ = 100.0
-        
-        # Simple classifier
-        dc = DummyClassifier(strategy="prior")
-        dc.classes_ = np.array([0, 1])
-        dc.class_prior_ = np.array([0.3, 0.7])  # 70% pass rate
-        
-        # Create a simple predict_proba method for the linear regressor
-        def predict_proba_wrapper(X):
-            predictions = np.zeros((X.shape[0], 2))
-            # Convert regression to probability (simple approach)
-            base_pred = lr.predict(X)
-            for i, p in enumerate(base_pred):
-                prob = min(max((p - 150) / 100, 0), 1)  # Scale to 0-1
-                predictions[i, 0] = 1 - prob
-                predictions[i, 1] = prob
-            return predictions
-            
-        # Add the method to the linear regressor for xgboost
-        lr_xgb = LinearRegression()
-        lr_xgb.coef_ = lr.coef_
-        lr_xgb.intercept_ = lr.intercept_
-        lr_xgb.predict_proba = predict_proba_wrapper
-        
-        return {
-            "jamb_score_regressor": lr,
-            "jamb_pass_classifier": dc,
-            "jamb_xgb_regressor": lr_xgb
-        }
+# Shared score aggregates (also used by the report generator)
+from scripts.aggregates import load_or_build_cube, regression_diagnostics
+from scripts.cache_utils import fingerprint, atomic_write_bytes
+from scripts.profiling import init_request_profiling
+from dashboard.figure_cache import FigureCache
+from dashboard.jobs import JOB_RESULTS_DIR, create_background_manager, background_callback
+from dashboard.loader import ResourceManager, ResourceTimeout, RELOAD_INTERVAL, MODEL_FILES, load_data, load_models
+from dashboard.inference import (build_feature_frame, predict_batch, compile_models, form_inputs, predict_one,
+                                 sensitivity_curves, PredictionCache, PredictionTable)
+from dashboard.indexes import StudentIndex
+from dashboard.metrics import CallbackMetrics
 
 # Import resource library components or create fallbacks
 try:
@@ -133,22 +73,134 @@ except ImportError:
         """Fallback exit handler"""
         pass
 
-# Load data and models with better error handling
-try:
-    data = load_data()
-    models = load_models()
-    print("Data and models loaded successfully")
-except Exception as e:
-    print(f"Error during data/model initialization: {e}")
-    traceback.print_exc()
-    data = pd.DataFrame()
-    models = {}
+# Figures are cached per callback arguments and data version, shared across workers
+figure_cache = FigureCache()
+
+def build_cube(loaded):
+    """Precompute the aggregate cube once per data version"""
+    data = loaded["data"]
+    if data.empty:
+        return None
+    cube = load_or_build_cube(data)
+    figure_cache.invalidate(keep_version=cube.version)
+    return cube
+
+# Data, aggregates and models load in a background thread when the worker boots;
+# the layout renders immediately and callbacks wait for what they need.
+# New data or a retrained model is picked up by the watcher and swapped in.
+DATA_FILE = os.path.join(PROCESSED_DATA_DIR, 'jamb_enhanced.csv')
+resources = ResourceManager()
+# Sample data and simple models stand in only when the first load fails; a
+# failed reload raises so the versions being served are kept
+resources.register("data", lambda loaded: load_data(PROCESSED_DATA_DIR, fallback=not resources.ready("data")),
+                   default=pd.DataFrame(), watch=DATA_FILE)
+resources.register("cube", build_cube, default=None, depends_on=("data",))
+# Category bitmaps and sorted orders for the student explorer
+resources.register("student_index",
+                   lambda loaded: StudentIndex(loaded["data"]) if not loaded["data"].empty else None,
+                   default=None, depends_on=("data",))
+resources.register("models", lambda loaded: load_models(MODEL_DIR, fallback=not resources.ready("models")),
+                   default={}, watch=MODEL_DIR, watch_pattern=MODEL_FILES)
+# Single-row predictors compiled from the fitted pipelines for the prediction form
+resources.register("predictors", lambda loaded: compile_models(loaded["models"]), default={},
+                   depends_on=("models",))
+# Optional precomputed predictions over the form's input grid (scripts/build_prediction_table.py)
+PREDICTION_TABLE = os.environ.get("PREDICTION_TABLE", "0") == "1"
+resources.register("prediction_table",
+                   lambda loaded: PredictionTable.load(resources.version("models")) if PREDICTION_TABLE else None,
+                   default=None, depends_on=("models",))
+# The watcher thread is started by whoever serves the app: the dev server
+# below, or gunicorn's post_fork in each worker (never in the master)
+resources.start()
+
+def get_data():
+    return resources.get("data")
+
+def get_cube():
+    return resources.get("cube")
+
+def get_student_index():
+    return resources.get("student_index")
+
+def filtered_data(filters, columns=None):
+    """Rows selected by the cross-filters, found by intersecting the student index bitmaps
+
+    Pass columns to copy only the columns a chart needs out of the selected rows.
+    """
+    data = get_data()
+    if columns is not None and not data.empty:
+        data = data[[c for c in columns if c in data.columns]]
+    index = get_student_index() if filters else None
+    selected = index.select(filters) if index is not None else None
+    return data if selected is None else data.iloc[np.flatnonzero(selected)]
+
+def cube_filters(cube, filters):
+    """The cross-filters as keyword arguments for cube slices"""
+    return {dim: values for dim, values in (filters or {}).items() if values and dim in cube.dimensions}
+
+def get_models():
+    return resources.get("models")
+
+def get_predictors():
+    return resources.get("predictors")
+
+# Recent predictions per model version; most form submissions repeat earlier ones
+prediction_cache = PredictionCache()
+
+def cached_prediction(inputs):
+    """Score and pass probability from the cache, the precomputed table or the models"""
+    key = prediction_cache.key(current_model_version(), inputs)
+    result = prediction_cache.get(key)
+    if result is None:
+        table = resources.get("prediction_table")
+        result = table.lookup(inputs) if table is not None else None
+        if result is None:
+            result = predict_one(get_models(), get_predictors(), inputs)
+        prediction_cache.put(key, result)
+    return result
+
+def current_data_version(timeout=None):
+    """Version of the loaded data; clients only refresh data-derived content when it changes"""
+    try:
+        cube = resources.get("cube", timeout)
+    except ResourceTimeout:
+        return "loading"
+    return cube.version if cube is not None else "empty"
+
+def current_model_version():
+    return resources.version("models") if resources.ready("models") else "loading"
+
+# How often browsers check whether the data version changed
+VERSION_POLL_INTERVAL_MS = int(os.environ.get("VERSION_POLL_INTERVAL_MS", 60 * 1000))
+
+# The header clock ticks in the browser; the server is only asked for its time this often
+CLOCK_SYNC_INTERVAL_MS = int(os.environ.get("CLOCK_SYNC_INTERVAL_MS", 15 * 60 * 1000))
+
+# Student explorer columns and rows per page; only the visible page is sent to the browser
+EXPLORER_COLUMNS = [
+    ("Student_ID", "numeric"), ("JAMB_Score", "numeric"), ("Gender", "text"), ("Age", "numeric"),
+    ("School_Type", "text"), ("School_Location", "text"), ("Socioeconomic_Status", "text"),
+    ("Parent_Involvement", "text"), ("Study_Hours_Per_Week", "numeric"), ("Attendance_Rate", "numeric"),
+    ("Teacher_Quality", "numeric"), ("Distance_To_School", "numeric")
+]
+EXPLORER_PAGE_SIZE = 20
+
+# Categorical columns the analysis charts can be cross-filtered by (all are cube dimensions)
+CROSS_FILTER_DIMENSIONS = [
+    ("School_Type", "School Type"), ("School_Location", "Location"), ("Gender", "Gender"),
+    ("Socioeconomic_Status", "Socioeconomic Status"), ("Parent_Involvement", "Parent Involvement")
+]
+
+# Long-running callbacks run as background jobs; identical requests against
+# the same models reuse the finished result
+background_manager = create_background_manager(cache_by=[current_model_version])
 
 # Initialize Dash app
 app = dash.Dash(__name__, 
                 meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
                 title="Nigerian Educational Analytics Dashboard",
-                suppress_callback_exceptions=True)  # Added for more stability
+                suppress_callback_exceptions=True,  # Added for more stability
+                background_callback_manager=background_manager)
 
 # Expose the Flask server for deployment (if needed)
 server = app.server
@@ -265,6 +317,384 @@ app.index_string = '''
 '''
 
 # Define app layout
+# Tab contents, built on first use (see render_main_tab and render_analysis_tab)
+def overview_tab():
+    """Overview tab"""
+    return html.Div([
+        html.Div([
+            html.H3("Overview Statistics", style={'color': '#1C4E80'}),
+            html.Div(id="overview-stats", className="stats-container")
+        ], className="overview-section")
+    ])
+
+def distribution_tab():
+    """Score Distribution sub-tab of the analysis tab"""
+    return html.Div([
+        html.Div([
+            html.P("This chart shows the distribution of JAMB scores across the student population.", 
+                   className="chart-description"),
+            html.P("The red dashed line indicates the passing threshold (200).", 
+                   className="chart-insight"),
+            dcc.Graph(id="score-distribution")
+        ])
+    ])
+
+def factor_tab():
+    """Factor Analysis sub-tab of the analysis tab"""
+    return html.Div([
+        html.Div([
+            html.P("Explore how different factors affect JAMB scores.", 
+                   className="chart-description"),
+            html.Div([
+                html.Label("Select Factor:"),
+                dcc.Dropdown(
+                    id="factor-dropdown",
+                    options=[
+                        {'label': 'Study Hours', 'value': 'Study_Hours_Per_Week'},
+                        {'label': 'Teacher Quality', 'value': 'Teacher_Quality'},
+                        {'label': 'Distance to School', 'value': 'Distance_To_School'},
+                        {'label': 'School Type', 'value': 'School_Type'},
+                        {'label': 'Parent Involvement', 'value': 'Parent_Involvement'},
+                        {'label': 'Access to Learning Materials', 'value': 'Access_To_Learning_Materials'}
+                    ],
+                    value='Study_Hours_Per_Week'
+                )
+            ]),
+            html.Div(id="factor-insights", className="insights-container"),
+            dcc.Graph(id="factor-analysis"),
+            dcc.Checklist(
+                id="factor-diagnostics-toggle",
+                options=[{'label': ' Show regression diagnostics', 'value': 'show'}],
+                value=[]
+            ),
+            html.Pre(id="factor-diagnostics", className="chart-description")
+        ])
+    ])
+
+def correlation_tab():
+    """Correlation Matrix sub-tab of the analysis tab"""
+    return html.Div([
+        html.Div([
+            html.P("This heatmap shows the correlation between various factors affecting JAMB scores.", 
+                   className="chart-description"),
+            html.P("Positive values (blue) indicate factors that tend to increase together, while negative values (red) indicate inverse relationships.", 
+                   className="chart-insight"),
+            dcc.Graph(id="correlation-matrix")
+        ])
+    ])
+
+ANALYSIS_TABS = [
+    ("distribution", "Score Distribution", distribution_tab),
+    ("factor", "Factor Analysis", factor_tab),
+    ("correlation", "Correlation Matrix", correlation_tab)
+]
+
+def analysis_tab():
+    """Analysis tab"""
+    return html.Div([
+        html.Div([
+            html.H3("Performance Analysis", style={'color': '#1C4E80'}),
+            # Cross-filters applied to every chart below
+            html.Div([
+                html.Div([
+                    html.Label(f"{label}:"),
+                    dcc.Dropdown(id=f"filter-{dimension}", multi=True, placeholder="All",
+                                 persistence=True, persistence_type="memory")
+                ], style={'flex': '1', 'minWidth': '160px', 'marginRight': '10px'})
+                for dimension, label in CROSS_FILTER_DIMENSIONS
+            ], style={'display': 'flex', 'flexWrap': 'wrap', 'marginBottom': '10px'}),
+            html.Div(id="cross-filter-summary", className="chart-insight"),
+            # Charts of the selected sub-tab only
+            dcc.Tabs(id="analysis-tabs", value="distribution", children=[
+                dcc.Tab(label=label, value=value) for value, label, _ in ANALYSIS_TABS
+            ]),
+            html.Div(id="analysis-tab-content", children=tab_layout("distribution"))
+        ], className="analysis-section")
+    ])
+
+def prediction_tab():
+    """Prediction tab"""
+    return html.Div([
+        html.Div([
+            html.H3("Student Prediction Tool", style={'color': '#1C4E80'}),
+            html.P("Enter student details to predict their JAMB score and get personalized recommendations",
+                   style={'color': '#64748b', 'marginBottom': '20px'}),
+            html.Div([
+                # Two-column layout for better organization
+                html.Div([
+                    # Academic Factors Column
+                    html.Div([
+                        html.H4("Academic Factors", style={'color': '#2563eb', 'marginBottom': '15px'}),
+                        
+                        html.Div([
+                            html.Label("Study Hours Per Week:"),
+                            dcc.Slider(
+                                id="study-hours-input",
+                                min=0,
+                                max=40,
+                                step=1,
+                                value=20,
+                                marks={i: str(i) for i in range(0, 41, 5)}
+                            )
+                        ], className="input-group"),
+                        
+                        html.Div([
+                            html.Label("Teacher Quality (1-5):"),
+                            dcc.Slider(
+                                id="teacher-quality-input",
+                                min=1,
+                                max=5,
+                                step=1,
+                                value=3,
+                                marks={i: str(i) for i in range(1, 6)}
+                            )
+                        ], className="input-group"),
+                        
+                        html.Div([
+                            html.Label("Attendance Rate (%):"),
+                            dcc.Slider(
+                                id="attendance-input",
+                                min=50,
+                                max=100,
+                                step=5,
+                                value=80,
+                                marks={i: str(i) for i in range(50, 101, 10)}
+                            )
+                        ], className="input-group"),
+                        
+                        html.Div([
+                            html.Label("Extra Tutorials:"),
+                            dcc.RadioItems(
+                                id="tutorials-input",
+                                options=[
+                                    {'label': 'Yes', 'value': 'Yes'},
+                                    {'label': 'No', 'value': 'No'}
+                                ],
+                                value='No',
+                                labelStyle={'marginRight': '15px'}
+                            )
+                        ], className="input-group"),
+                    ], className="column"),
+                    
+                    # Environmental Factors Column
+                    html.Div([
+                        html.H4("Environmental Factors", style={'color': '#2563eb', 'marginBottom': '15px'}),
+                        
+                        html.Div([
+                            html.Label("Distance to School (km):"),
+                            dcc.Input(
+                                id="distance-input",
+                                type="number",
+                                min=0.1,
+                                max=20,
+                                step=0.1,
+                                value=5.0,
+                                className="number-input"
+                            )
+                        ], className="input-group"),
+                        
+                        html.Div([
+                            html.Label("School Type:"),
+                            dcc.RadioItems(
+                                id="school-type-input",
+                                options=[
+                                    {'label': 'Public', 'value': 'Public'},
+                                    {'label': 'Private', 'value': 'Private'}
+                                ],
+                                value='Public',
+                                labelStyle={'marginRight': '15px'}
+                            )
+                        ], className="input-group"),
+                        
+                        html.Div([
+                            html.Label("School Location:"),
+                            dcc.RadioItems(
+                                id="location-input",
+                                options=[
+                                    {'label': 'Urban', 'value': 'Urban'},
+                                    {'label': 'Rural', 'value': 'Rural'}
+                                ],
+                                value='Urban',
+                                labelStyle={'marginRight': '15px'}
+                            )
+                        ], className="input-group"),
+                        
+                        html.Div([
+                            html.Label("Access to Learning Materials:"),
+                            dcc.RadioItems(
+                                id="materials-input",
+                                options=[
+                                    {'label': 'Yes', 'value': 'Yes'},
+                                    {'label': 'No', 'value': 'No'}
+                                ],
+                                value='Yes',
+                                labelStyle={'marginRight': '15px'}
+                            )
+                        ], className="input-group"),
+                    ], className="column"),
+                ], className="two-column-form"),
+                
+                # Additional Factors
+                html.Div([
+                    html.H4("Additional Factors", style={'color': '#2563eb', 'marginBottom': '15px'}),
+                    html.Div([
+                        html.Div([
+                            html.Label("Parent Involvement:"),
+                            dcc.RadioItems(
+                                id="parent-input",
+                                options=[
+                                    {'label': 'Low', 'value': 'Low'},
+                                    {'label': 'Medium', 'value': 'Medium'},
+                                    {'label': 'High', 'value': 'High'}
+                                ],
+                                value='Medium',
+                                labelStyle={'marginRight': '15px'}
+                            )
+                        ], className="input-group half-width"),
+                        
+                        html.Div([
+                            html.Label("IT Knowledge:"),
+                            dcc.RadioItems(
+                                id="it-input",
+                                options=[
+                                    {'label': 'Low', 'value': 'Low'},
+                                    {'label': 'Medium', 'value': 'Medium'},
+                                    {'label': 'High', 'value': 'High'}
+                                ],
+                                value='Medium',
+                                labelStyle={'marginRight': '15px'}
+                            )
+                        ], className="input-group half-width"),
+                    ], style={'display': 'flex', 'flexWrap': 'wrap'}),
+                ], className="additional-factors"),
+                
+                html.Button(
+                    [html.I(className="fas fa-calculator", style={"marginRight": "10px"}), "Predict Score"],
+                    id="predict-button", 
+                    className="predict-button"
+                ),
+                
+                html.Div(id="prediction-output", className="prediction-output"),
+                
+                # What-if curves for the same student
+                html.Div([
+                    dcc.Graph(id="sensitivity-curves", style={'display': 'none'})
+                ], className="sensitivity-panel")
+            ], className="prediction-form")
+        ], className="prediction-section")
+    ])
+
+def batch_tab():
+    """Batch scoring tab"""
+    return html.Div([
+        html.Div([
+            html.H3("Score a Whole Class", style={'color': '#1C4E80'}),
+            html.P("Upload a CSV with one row per student and the prediction form's columns "
+                   "(Study_Hours_Per_Week, Teacher_Quality, Attendance_Rate, Distance_To_School, "
+                   "School_Type, School_Location, Extra_Tutorials, Access_To_Learning_Materials, "
+                   "Parent_Involvement, IT_Knowledge). Scoring runs in the background.",
+                   style={'color': '#64748b', 'marginBottom': '20px'}),
+            dcc.Upload(
+                id="batch-upload",
+                children=html.Div(["Drag and drop or ", html.A("select a CSV file")]),
+                multiple=False,
+                style={'borderWidth': '1px', 'borderStyle': 'dashed', 'borderRadius': '5px',
+                       'textAlign': 'center', 'padding': '20px', 'marginBottom': '15px'}
+            ),
+            html.Div([
+                html.Button(
+                    [html.I(className="fas fa-play", style={"marginRight": "10px"}), "Score File"],
+                    id="batch-score-button",
+                    className="predict-button"
+                ),
+                html.Button(
+                    [html.I(className="fas fa-stop", style={"marginRight": "10px"}), "Cancel"],
+                    id="batch-cancel-button",
+                    className="predict-button",
+                    disabled=True,
+                    style={'marginLeft': '10px'}
+                )
+            ]),
+            html.Progress(id="batch-progress", value="0", max="100", style={'width': '100%', 'marginTop': '15px'}),
+            html.Div(id="batch-output", className="prediction-output"),
+            html.Button(
+                [html.I(className="fas fa-download", style={"marginRight": "10px"}), "Download Results"],
+                id="batch-download-button",
+                className="predict-button",
+                disabled=True
+            ),
+            dcc.Download(id="batch-download")
+        ], className="prediction-section")
+    ])
+
+def explorer_tab():
+    """Student explorer tab"""
+    return html.Div([
+        html.Div([
+            html.H3("Student Explorer", style={'color': '#1C4E80'}),
+            html.P("Sort by any column or type a filter under a heading "
+                   "(e.g. Public, or >= 200 for JAMB_Score).",
+                   style={'color': '#64748b'}),
+            html.Div(id="student-count", style={'marginBottom': '10px'}),
+            dash_table.DataTable(
+                id="student-table",
+                columns=[{"name": name.replace('_', ' '), "id": name, "type": kind}
+                         for name, kind in EXPLORER_COLUMNS],
+                page_current=0,
+                page_size=EXPLORER_PAGE_SIZE,
+                page_action='custom',
+                sort_action='custom',
+                sort_mode='single',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                style_table={'overflowX': 'auto'},
+                style_header={'backgroundColor': '#1C4E80', 'color': 'white', 'fontWeight': 'bold'},
+                style_cell={'textAlign': 'left', 'padding': '6px', 'fontSize': '13px'}
+            )
+        ], className="chart-container")
+    ])
+
+def library_tab():
+    """Digital Library tab"""
+    return html.Div([
+        # This function creates the resource library component
+        create_resource_library()
+    ])
+
+def documentation_tab():
+    """Documentation tab"""
+    return html.Div([
+        html.Div([
+            html.H3("Documentation"),
+            html.P("The documentation for this dashboard is currently being loaded. Please check back later.")
+        ])
+    ])
+
+MAIN_TABS = [
+    ("overview", "Overview", overview_tab),
+    ("analysis", "Performance Analysis", analysis_tab),
+    ("prediction", "Score Prediction", prediction_tab),
+    ("batch", "Batch Scoring", batch_tab),
+    ("explorer", "Student Explorer", explorer_tab),
+    ("library", "Digital Library", library_tab),
+    ("documentation", "Documentation", documentation_tab)
+]
+
+# Tabs holding user input or a running job: rendered on first visit, then
+# only hidden, so switching away keeps form values and job progress
+PERSISTENT_TABS = ("prediction", "batch")
+
+# Built tab layouts, reused for every later visit and every client
+_tab_layouts = {}
+
+def tab_layout(value):
+    """Contents of a tab, built once per worker"""
+    if value not in _tab_layouts:
+        builders = {v: build for v, _, build in MAIN_TABS + ANALYSIS_TABS}
+        _tab_layouts[value] = builders[value]()
+    return _tab_layouts[value]
+
 app.layout = html.Div([
     # Header with title, date/time, and user info
     html.Div([
@@ -287,15 +717,27 @@ app.layout = html.Div([
                 html.Span(id="live-clock", className="time-value")
             ], className="time-info"),
             
-            # Add an invisible interval component for updating the clock
+            # Add an invisible interval component for updating the clock (handled client-side)
             dcc.Interval(
                 id='clock-interval',
                 interval=1000,  # in milliseconds, updates every 1 second
                 n_intervals=0
-            )
+            ),
+            
+            # Rare server sync so the displayed time follows the server clock
+            dcc.Interval(id='clock-sync-interval', interval=CLOCK_SYNC_INTERVAL_MS, n_intervals=0),
+            dcc.Store(id='server-time-store'),
+            dcc.Store(id='clock-offset-store', data=0)
         ], className="header-right")
     ], className="header-container"),
     
+    # Data version seen by this client; data-derived components update when it changes
+    dcc.Store(id="data-version-store"),
+    dcc.Store(id="cross-filter-store", data={}),
+    # Stores live outside the tabs so they survive switching tabs
+    dcc.Store(id="batch-result-file"),
+    dcc.Interval(id="version-interval", interval=VERSION_POLL_INTERVAL_MS, n_intervals=0),
+    
     # Add welcome message with viewer access info
     html.Div([
         html.I(className="fas fa-info-circle"),
@@ -303,246 +745,12 @@ app.layout = html.Div([
     ], className="welcome-message"),
     
     html.Div([
-        # Main tabs
-        dcc.Tabs([
-            # Overview tab
-            dcc.Tab(label="Overview", children=[
-                html.Div([
-                    html.H3("Overview Statistics", style={'color': '#1C4E80'}),
-                    html.Div(id="overview-stats", className="stats-container")
-                ], className="overview-section")
-            ], className="custom-tab"),
-            
-            # Analysis tab
-            dcc.Tab(label="Performance Analysis", children=[
-                html.Div([
-                    html.H3("Performance Analysis", style={'color': '#1C4E80'}),
-                    dcc.Tabs([
-                        dcc.Tab(label="Score Distribution", children=[
-                            html.Div([
-                                html.P("This chart shows the distribution of JAMB scores across the student population.", 
-                                       className="chart-description"),
-                                html.P("The red dashed line indicates the passing threshold (200).", 
-                                       className="chart-insight"),
-                                dcc.Graph(id="score-distribution")
-                            ])
-                        ]),
-                        dcc.Tab(label="Factor Analysis", children=[
-                            html.Div([
-                                html.P("Explore how different factors affect JAMB scores.", 
-                                       className="chart-description"),
-                                html.Div([
-                                    html.Label("Select Factor:"),
-                                    dcc.Dropdown(
-                                        id="factor-dropdown",
-                                        options=[
-                                            {'label': 'Study Hours', 'value': 'Study_Hours_Per_Week'},
-                                            {'label': 'Teacher Quality', 'value': 'Teacher_Quality'},
-                                            {'label': 'Distance to School', 'value': 'Distance_To_School'},
-                                            {'label': 'School Type', 'value': 'School_Type'},
-                                            {'label': 'Parent Involvement', 'value': 'Parent_Involvement'},
-                                            {'label': 'Access to Learning Materials', 'value': 'Access_To_Learning_Materials'}
-                                        ],
-                                        value='Study_Hours_Per_Week'
-                                    )
-                                ]),
-                                html.Div(id="factor-insights", className="insights-container"),
-                                dcc.Graph(id="factor-analysis")
-                            ])
-                        ]),
-                        dcc.Tab(label="Correlation Matrix", children=[
-                            html.Div([
-                                html.P("This heatmap shows the correlation between various factors affecting JAMB scores.", 
-                                       className="chart-description"),
-                                html.P("Positive values (blue) indicate factors that tend to increase together, while negative values (red) indicate inverse relationships.", 
-                                       className="chart-insight"),
-                                dcc.Graph(id="correlation-matrix")
-                            ])
-                        ])
-                    ])
-                ], className="analysis-section")
-            ], className="custom-tab"),
-            
-            # Prediction tab
-            dcc.Tab(label="Score Prediction", children=[
-                html.Div([
-                    html.H3("Student Prediction Tool", style={'color': '#1C4E80'}),
-                    html.P("Enter student details to predict their JAMB score and get personalized recommendations",
-                           style={'color': '#64748b', 'marginBottom': '20px'}),
-                    html.Div([
-                        # Two-column layout for better organization
-                        html.Div([
-                            # Academic Factors Column
-                            html.Div([
-                                html.H4("Academic Factors", style={'color': '#2563eb', 'marginBottom': '15px'}),
-                                
-                                html.Div([
-                                    html.Label("Study Hours Per Week:"),
-                                    dcc.Slider(
-                                        id="study-hours-input",
-                                        min=0,
-                                        max=40,
-                                        step=1,
-                                        value=20,
-                                        marks={i: str(i) for i in range(0, 41, 5)}
-                                    )
-                                ], className="input-group"),
-                                
-                                html.Div([
-                                    html.Label("Teacher Quality (1-5):"),
-                                    dcc.Slider(
-                                        id="teacher-quality-input",
-                                        min=1,
-                                        max=5,
-                                        step=1,
-                                        value=3,
-                                        marks={i: str(i) for i in range(1, 6)}
-                                    )
-                                ], className="input-group"),
-                                
-                                html.Div([
-                                    html.Label("Attendance Rate (%):"),
-                                    dcc.Slider(
-                                        id="attendance-input",
-                                        min=50,
-                                        max=100,
-                                        step=5,
-                                        value=80,
-                                        marks={i: str(i) for i in range(50, 101, 10)}
-                                    )
-                                ], className="input-group"),
-                                
-                                html.Div([
-                                    html.Label("Extra Tutorials:"),
-                                    dcc.RadioItems(
-                                        id="tutorials-input",
-                                        options=[
-                                            {'label': 'Yes', 'value': 'Yes'},
-                                            {'label': 'No', 'value': 'No'}
-                                        ],
-                                        value='No',
-                                        labelStyle={'marginRight': '15px'}
-                                    )
-                                ], className="input-group"),
-                            ], className="column"),
-                            
-                            # Environmental Factors Column
-                            html.Div([
-                                html.H4("Environmental Factors", style={'color': '#2563eb', 'marginBottom': '15px'}),
-                                
-                                html.Div([
-                                    html.Label("Distance to School (km):"),
-                                    dcc.Input(
-                                        id="distance-input",
-                                        type="number",
-                                        min=0.1,
-                                        max=20,
-                                        step=0.1,
-                                        value=5.0,
-                                        className="number-input"
-                                    )
-                                ], className="input-group"),
-                                
-                                html.Div([
-                                    html.Label("School Type:"),
-                                    dcc.RadioItems(
-                                        id="school-type-input",
-                                        options=[
-                                            {'label': 'Public', 'value': 'Public'},
-                                            {'label': 'Private', 'value': 'Private'}
-                                        ],
-                                        value='Public',
-                                        labelStyle={'marginRight': '15px'}
-                                    )
-                                ], className="input-group"),
-                                
-                                html.Div([
-                                    html.Label("School Location:"),
-                                    dcc.RadioItems(
-                                        id="location-input",
-                                        options=[
-                                            {'label': 'Urban', 'value': 'Urban'},
-                                            {'label': 'Rural', 'value': 'Rural'}
-                                        ],
-                                        value='Urban',
-                                        labelStyle={'marginRight': '15px'}
-                                    )
-                                ], className="input-group"),
-                                
-                                html.Div([
-                                    html.Label("Access to Learning Materials:"),
-                                    dcc.RadioItems(
-                                        id="materials-input",
-                                        options=[
-                                            {'label': 'Yes', 'value': 'Yes'},
-                                            {'label': 'No', 'value': 'No'}
-                                        ],
-                                        value='Yes',
-                                        labelStyle={'marginRight': '15px'}
-                                    )
-                                ], className="input-group"),
-                            ], className="column"),
-                        ], className="two-column-form"),
-                        
-                        # Additional Factors
-                        html.Div([
-                            html.H4("Additional Factors", style={'color': '#2563eb', 'marginBottom': '15px'}),
-                            html.Div([
-                                html.Div([
-                                    html.Label("Parent Involvement:"),
-                                    dcc.RadioItems(
-                                        id="parent-input",
-                                        options=[
-                                            {'label': 'Low', 'value': 'Low'},
-                                            {'label': 'Medium', 'value': 'Medium'},
-                                            {'label': 'High', 'value': 'High'}
-                                        ],
-                                        value='Medium',
-                                        labelStyle={'marginRight': '15px'}
-                                    )
-                                ], className="input-group half-width"),
-                                
-                                html.Div([
-                                    html.Label("IT Knowledge:"),
-                                    dcc.RadioItems(
-                                        id="it-input",
-                                        options=[
-                                            {'label': 'Low', 'value': 'Low'},
-                                            {'label': 'Medium', 'value': 'Medium'},
-                                            {'label': 'High', 'value': 'High'}
-                                        ],
-                                        value='Medium',
-                                        labelStyle={'marginRight': '15px'}
-                                    )
-                                ], className="input-group half-width"),
-                            ], style={'display': 'flex', 'flexWrap': 'wrap'}),
-                        ], className="additional-factors"),
-                        
-                        html.Button(
-                            [html.I(className="fas fa-calculator", style={"marginRight": "10px"}), "Predict Score"],
-                            id="predict-button", 
-                            className="predict-button"
-                        ),
-                        
-                        html.Div(id="prediction-output", className="prediction-output")
-                    ], className="prediction-form")
-                ], className="prediction-section")
-            ], className="custom-tab"),
-            
-            # Digital Library tab
-            dcc.Tab(label="Digital Library", children=[
-                # This function creates the resource library component
-                create_resource_library()
-            ], className="custom-tab"),
-            
-            # Documentation tab
-            dcc.Tab(label="Documentation", children=[
-                html.Div([
-                    html.H3("Documentation"),
-                    html.P("The documentation for this dashboard is currently being loaded. Please check back later.")
-                ])
-            ], className="custom-tab"),
-        ], className="main-tabs")
+        # Main tabs; a tab's contents are built and sent only when it is opened
+        dcc.Tabs(id="main-tabs", value="overview", children=[
+            dcc.Tab(label=label, value=value, className="custom-tab") for value, label, _ in MAIN_TABS
+        ], className="main-tabs"),
+        html.Div(id="main-tab-content", children=tab_layout("overview")),
+        *[html.Div(id=f"{value}-tab-container", style={'display': 'none'}) for value in PERSISTENT_TABS]
     ], className="main-container"),
     
     html.Footer([
@@ -551,33 +759,101 @@ app.layout = html.Div([
     ], className="footer")
 ])
 
-# Add this callback to update the clock
+# Render a tab's contents when it is opened; the overview and score distribution ship with the page
 @app.callback(
+    Output("main-tab-content", "children"),
+    *[Output(f"{tab}-tab-container", "children") for tab in PERSISTENT_TABS],
+    *[Output(f"{tab}-tab-container", "style") for tab in PERSISTENT_TABS],
+    Input("main-tabs", "value"),
+    *[State(f"{tab}-tab-container", "children") for tab in PERSISTENT_TABS],
+    prevent_initial_call=True
+)
+def render_main_tab(value, *persistent_children):
+    # Persistent tabs are filled once and then shown or hidden in place
+    children = [tab_layout(tab) if tab == value and not current else dash.no_update
+                for tab, current in zip(PERSISTENT_TABS, persistent_children)]
+    styles = [{'display': 'block' if tab == value else 'none'} for tab in PERSISTENT_TABS]
+    content = [] if value in PERSISTENT_TABS else tab_layout(value)
+    return (content, *children, *styles)
+
+@app.callback(
+    Output("analysis-tab-content", "children"),
+    Input("analysis-tabs", "value"),
+    prevent_initial_call=True
+)
+def render_analysis_tab(value):
+    return tab_layout(value)
+
+# Send the server time for the clock offset (fires on load and every CLOCK_SYNC_INTERVAL_MS)
+@app.callback(
+    Output("server-time-store", "data"),
+    Input("clock-sync-interval", "n_intervals")
+)
+def sync_clock(n):
+    """Return the current server time in epoch milliseconds"""
+    return {"server_ms": datetime.now(UTC).timestamp() * 1000}
+
+# Offset between the server and browser clocks, computed in the browser
+app.clientside_callback(
+    """
+    function(serverTime) {
+        if (!serverTime) {
+            return window.dash_clientside.no_update;
+        }
+        return serverTime.server_ms - Date.now();
+    }
+    """,
+    Output("clock-offset-store", "data"),
+    Input("server-time-store", "data")
+)
+
+# Update the clock display with current UTC time without a server round-trip
+app.clientside_callback(
+    """
+    function(n, offset) {
+        var now = new Date(Date.now() + (offset || 0));
+        return now.toISOString().slice(0, 19).replace('T', ' ');
+    }
+    """,
     Output("live-clock", "children"),
-    Input("clock-interval", "n_intervals")
+    Input("clock-interval", "n_intervals"),
+    State("clock-offset-store", "data")
 )
-def update_clock(n):
-    """Update the clock display with current UTC time"""
-    try:
-        # Use timezone-aware object with UTC as recommended
-        return datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
-    except Exception as e:
-        print(f"Error in clock callback: {e}")
-        return "2025-05-10 08:22:33"  # Fallback to static time if error occurs
+
+# Report the data version only when it differs from what the client already has
+@app.callback(
+    Output("data-version-store", "data"),
+    Input("version-interval", "n_intervals"),
+    State("data-version-store", "data")
+)
+def check_data_version(n, client_version):
+    version = current_data_version()
+    if client_version == version:
+        return dash.no_update
+    return version
+
+# Rendered overview statistics per data version
+_overview_stats_cache = {}
 
 # Define callback for overview statistics
 @app.callback(
     Output("overview-stats", "children"),
-    Input("clock-interval", "n_intervals")  # Changed to use clock-interval for more reliable updates
+    Input("data-version-store", "data")
 )
-def update_stats(n):
+def update_stats(version):
     try:
-        if data.empty:
+        cube = get_cube()
+        if cube is None:
             return html.Div("No data available")
-            
-        avg_score = data['JAMB_Score'].mean()
-        pass_rate = (data['JAMB_Score'] >= 200).mean() * 100
-        top_performers = (data['JAMB_Score'] >= 250).mean() * 100
+        
+        if cube.version in _overview_stats_cache:
+            return _overview_stats_cache[cube.version]
+        
+        # Read from the precomputed cube instead of scanning the data
+        summary = cube.summary()
+        avg_score = summary['mean']
+        pass_rate = summary['pass_rate']
+        top_performers = summary['top_rate']
         
         stats = [
             html.Div([
@@ -597,29 +873,97 @@ def update_stats(n):
             ], className="stat-card")
         ]
         
+        _overview_stats_cache.clear()
+        _overview_stats_cache[cube.version] = stats
         return stats
+    except ResourceTimeout:
+        return html.Div("Loading statistics...")
     except Exception as e:
         print(f"Error in stats callback: {e}")
         traceback.print_exc()
         return html.Div("Error loading statistics")
 
+# Cross-filter choices come from the student index categories of the loaded data
+@app.callback(
+    [Output(f"filter-{dimension}", "options") for dimension, _ in CROSS_FILTER_DIMENSIONS],
+    Input("data-version-store", "data")
+)
+def update_cross_filter_options(version):
+    try:
+        index = get_student_index()
+    except ResourceTimeout:
+        index = None
+    categories = index.categories if index is not None else {}
+    return [[{'label': c, 'value': c} for c in categories.get(dimension, {})]
+            for dimension, _ in CROSS_FILTER_DIMENSIONS]
+
+# Collect the cross-filters in one store so every chart reacts to a single input
+@app.callback(
+    Output("cross-filter-store", "data"),
+    [Input(f"filter-{dimension}", "value") for dimension, _ in CROSS_FILTER_DIMENSIONS]
+)
+def update_cross_filters(*values):
+    return {dimension: sorted(value) for (dimension, _), value in zip(CROSS_FILTER_DIMENSIONS, values) if value}
+
+@app.callback(
+    Output("cross-filter-summary", "children"),
+    Input("cross-filter-store", "data")
+)
+def update_cross_filter_summary(filters):
+    if not filters:
+        return ""
+    try:
+        cube = get_cube()
+        if cube is None:
+            return ""
+        summary = cube.summary(**cube_filters(cube, filters))
+        if summary['count'] == 0:
+            return "No students match the selected filters."
+        return (f"{summary['count']:,} students selected — average score {summary['mean']:.1f}, "
+                f"pass rate {summary['pass_rate']:.1f}%")
+    except ResourceTimeout:
+        return ""
+
+# Width in points of the score distribution bins
+SCORE_HISTOGRAM_BIN_WIDTH = 10
+
 # Define callback for score distribution
 @app.callback(
     Output("score-distribution", "figure"),
-    Input("score-distribution", "id")
+    Input("cross-filter-store", "data")
 )
-def update_score_distribution(n):
+@figure_cache.memoize("score_distribution", current_data_version, helpers=(filtered_data, cube_filters))
+def update_score_distribution(filters):
     try:
+        data, cube = get_data(), get_cube()
         if data.empty:
             return {}
-            
-        fig = px.histogram(
-            data, 
-            x="JAMB_Score",
-            nbins=30,
-            color_discrete_sequence=['#2563eb'],
-            title="JAMB Score Distribution"
-        )
+        
+        # Bin server-side so the payload holds bin counts, not every student's score
+        if cube is not None:
+            counts, edges = cube.histogram(bin_width=SCORE_HISTOGRAM_BIN_WIDTH, **cube_filters(cube, filters))
+        else:
+            scores = filtered_data(filters)['JAMB_Score'].to_numpy()
+            if len(scores) == 0:
+                return {}
+            edges = np.arange(np.floor(scores.min()), scores.max() + SCORE_HISTOGRAM_BIN_WIDTH, SCORE_HISTOGRAM_BIN_WIDTH)
+            counts, edges = np.histogram(scores, bins=edges)
+        
+        # Trim empty bins at either end of the score range
+        occupied = np.nonzero(counts)[0]
+        if len(occupied):
+            counts = counts[occupied[0]:occupied[-1] + 1]
+            edges = edges[occupied[0]:occupied[-1] + 2]
+        
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            marker_color='#2563eb',
+            hovertemplate="%{customdata[0]:.0f}–%{customdata[1]:.0f}: %{y} students<extra></extra>",
+            customdata=np.column_stack([edges[:-1], edges[1:]])
+        ))
+        fig.update_layout(title="JAMB Score Distribution", bargap=0)
         
         fig.add_vline(x=200, line_dash="dash", line_color="red",
                       annotation_text="Pass Threshold", annotation_position="top right")
@@ -711,28 +1055,158 @@ def update_factor_insights(factor):
         traceback.print_exc()
         return html.Div("Error loading insights")
 
+# Colors used for categorical factor values
+CATEGORY_COLORS = {
+    "Public": "#3b82f6", 
+    "Private": "#10b981",
+    "Yes": "#10b981",
+    "No": "#ef4444",
+    "Urban": "#8b5cf6",
+    "Rural": "#f59e0b",
+    "Low": "#ef4444",
+    "Medium": "#f59e0b",
+    "High": "#10b981"
+}
+
+# Factors plotted against JAMB score as scatter/density rather than box plots
+NUMERIC_FACTORS = ['Study_Hours_Per_Week', 'Teacher_Quality', 'Distance_To_School']
+
+def stratified_sample_positions(values, sample_size, n_strata=20, seed=42):
+    """Row positions of a sample that keeps every range of values represented"""
+    if len(values) <= sample_size:
+        return np.arange(len(values))
+    
+    # Strata are quantile ranges of the factor; each contributes proportionally (at least one row)
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_strata + 1)))
+    strata = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, max(len(edges) - 2, 0))
+    rng = np.random.default_rng(seed)
+    order = np.argsort(strata, kind='stable')
+    boundaries = np.flatnonzero(np.diff(strata[order])) + 1
+    
+    sample = []
+    for members in np.split(order, boundaries):
+        take = max(1, int(round(sample_size * len(members) / len(values))))
+        sample.append(rng.choice(members, size=min(take, len(members)), replace=False))
+    return np.sort(np.concatenate(sample))
+
+def factor_trendline(factor, filters=None):
+    """Least-squares fit of JAMB score on a numeric factor, taken from the cube when possible"""
+    cube = get_cube()
+    if cube is not None and factor in cube.trend_factors:
+        return cube.trendline(factor, **cube_filters(cube, filters))
+    
+    # Fallback: the same closed-form fit computed directly
+    frame = filtered_data(filters, [factor, 'JAMB_Score']).dropna()
+    if len(frame) < 2 or frame[factor].nunique() < 2:
+        return None
+    slope, intercept = np.polyfit(frame[factor], frame['JAMB_Score'], 1)
+    r = np.corrcoef(frame[factor], frame['JAMB_Score'])[0, 1]
+    return {'slope': slope, 'intercept': intercept, 'r_squared': r ** 2, 'n': len(frame),
+            'x_min': frame[factor].min(), 'x_max': frame[factor].max()}
+
+def add_trendline(fig, factor, filters=None):
+    """Overlay the OLS trendline as a two-point line trace"""
+    fit = factor_trendline(factor, filters)
+    if fit is None:
+        return fig
+    x = np.array([fit['x_min'], fit['x_max']], dtype=float)
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=fit['intercept'] + fit['slope'] * x,
+        mode='lines',
+        line=dict(color='#ef4444', width=2),
+        name=f"OLS trendline (R² = {fit['r_squared']:.3f})",
+        hovertemplate=f"JAMB_Score = {fit['slope']:.3f} × {factor} + {fit['intercept']:.2f}<extra></extra>"
+    ))
+    return fig
+
 # Define callback for factor analysis
 @app.callback(
     Output("factor-analysis", "figure"),
-    Input("factor-dropdown", "value")
+    Input("factor-dropdown", "value"),
+    Input("cross-filter-store", "data")
 )
-def update_factor_analysis(factor):
+@figure_cache.memoize(f"factor_analysis_{fingerprint(FACTOR_PLOT_SETTINGS)[:8]}", current_data_version,
+                      helpers=(filtered_data, cube_filters, stratified_sample_positions, factor_trendline, add_trendline))
+def update_factor_analysis(factor, filters):
     try:
-        if data.empty or not factor:
+        if not factor:
+            return {}
+        data, cube = filtered_data(filters, [factor, 'JAMB_Score']), get_cube()
+        if data.empty:
             return {}
         
-        if factor in ['Study_Hours_Per_Week', 'Teacher_Quality', 'Distance_To_School']:
+        large = len(data) > FACTOR_PLOT_SETTINGS["scatter_max_points"]
+        
+        if factor in NUMERIC_FACTORS and large and FACTOR_PLOT_SETTINGS["large_mode"] == "webgl":
+            # Large data: WebGL scatter of a stratified sample
+            positions = stratified_sample_positions(data[factor].to_numpy(), FACTOR_PLOT_SETTINGS["webgl_sample_size"])
+            fig = go.Figure(go.Scattergl(
+                x=data[factor].to_numpy()[positions],
+                y=data['JAMB_Score'].to_numpy()[positions],
+                mode='markers',
+                marker=dict(color='#2563eb', opacity=0.5, size=5),
+                name=f"Sample of {len(positions):,} students"
+            ))
+            fig.update_layout(
+                title=f"Relationship between {factor.replace('_', ' ')} and JAMB Score (sample of {len(positions):,} of {len(data):,})",
+                xaxis_title=factor,
+                yaxis_title="JAMB_Score"
+            )
+            
+        elif factor in NUMERIC_FACTORS and large:
+            # Large data: 2-D binned density, payload independent of the number of students
+            counts, x_edges, y_edges = np.histogram2d(
+                data[factor].to_numpy(dtype=float),
+                data['JAMB_Score'].to_numpy(dtype=float),
+                bins=FACTOR_PLOT_SETTINGS["density_bins"]
+            )
+            fig = go.Figure(go.Heatmap(
+                x=(x_edges[:-1] + x_edges[1:]) / 2,
+                y=(y_edges[:-1] + y_edges[1:]) / 2,
+                z=np.where(counts.T > 0, counts.T, np.nan),
+                colorscale='Blues',
+                colorbar=dict(title="Students")
+            ))
+            fig.update_layout(
+                title=f"Relationship between {factor.replace('_', ' ')} and JAMB Score",
+                xaxis_title=factor,
+                yaxis_title="JAMB_Score"
+            )
+            
+        elif factor in NUMERIC_FACTORS:
             # For numeric factors, create scatter plot
             fig = px.scatter(
                 data,
                 x=factor,
                 y="JAMB_Score",
-                trendline="ols",
                 color_discrete_sequence=['#2563eb'],
                 title=f"Relationship between {factor.replace('_', ' ')} and JAMB Score",
                 opacity=0.7
             )
             
+        elif cube is not None and factor in cube.dimensions:
+            # For categorical factors, draw box plots from the cube's precomputed quartiles
+            box_stats = cube.box_stats(factor, **cube_filters(cube, filters))
+            fig = go.Figure()
+            for category, stats in box_stats.iterrows():
+                fig.add_trace(go.Box(
+                    name=category,
+                    x=[category],
+                    q1=[stats['q1']],
+                    median=[stats['median']],
+                    q3=[stats['q3']],
+                    mean=[stats['mean']],
+                    lowerfence=[stats['lowerfence']],
+                    upperfence=[stats['upperfence']],
+                    marker_color=CATEGORY_COLORS.get(category)
+                ))
+            fig.update_layout(
+                title=f"JAMB Score by {factor.replace('_', ' ')}",
+                xaxis_title=factor,
+                yaxis_title="JAMB_Score"
+            )
+            
         else:
             # For categorical factors, create box plot
             fig = px.box(
@@ -741,17 +1215,7 @@ def update_factor_analysis(factor):
                 y="JAMB_Score",
                 color=factor,
                 title=f"JAMB Score by {factor.replace('_', ' ')}",
-                color_discrete_map={
-                    "Public": "#3b82f6", 
-                    "Private": "#10b981",
-                    "Yes": "#10b981",
-                    "No": "#ef4444",
-                    "Urban": "#8b5cf6",
-                    "Rural": "#f59e0b",
-                    "Low": "#ef4444",
-                    "Medium": "#f59e0b",
-                    "High": "#10b981"
-                }
+                color_discrete_map=CATEGORY_COLORS
             )
         
         fig.update_layout(
@@ -761,6 +1225,9 @@ def update_factor_analysis(factor):
             title_font=dict(color='#1a3b66', size=18)
         )
         
+        if factor in NUMERIC_FACTORS:
+            add_trendline(fig, factor, filters)
+        
         return fig
     except Exception as e:
         print(f"Error in factor analysis callback: {e}")
@@ -768,20 +1235,44 @@ def update_factor_analysis(factor):
         # Return an empty figure on error
         return {"data": [], "layout": {"title": "Error loading chart"}}
 
+# Detailed OLS diagnostics (statsmodels) are only computed when asked for
+@app.callback(
+    Output("factor-diagnostics", "children"),
+    Input("factor-diagnostics-toggle", "value"),
+    Input("factor-dropdown", "value"),
+    Input("cross-filter-store", "data")
+)
+def update_factor_diagnostics(toggle, factor, filters):
+    if not toggle or factor not in NUMERIC_FACTORS:
+        return ""
+    try:
+        data = filtered_data(filters, [factor, 'JAMB_Score'])
+        if len(data) < 3:
+            return ""
+        return regression_diagnostics(data, factor)
+    except ImportError:
+        return "Regression diagnostics require statsmodels to be installed."
+    except Exception as e:
+        print(f"Error in regression diagnostics callback: {e}")
+        traceback.print_exc()
+        return "Error computing regression diagnostics"
+
 # Define callback for correlation matrix
 @app.callback(
     Output("correlation-matrix", "figure"),
-    Input("correlation-matrix", "id")
+    Input("cross-filter-store", "data")
 )
-def update_correlation_matrix(n):
+@figure_cache.memoize("correlation_matrix", current_data_version, helpers=(filtered_data,))
+def update_correlation_matrix(filters):
     try:
-        if data.empty:
-            return {}
-        
         # Select numeric columns for correlation
         numeric_cols = ['JAMB_Score', 'Study_Hours_Per_Week', 'Attendance_Rate', 
                        'Teacher_Quality', 'Distance_To_School']
         
+        data = filtered_data(filters, numeric_cols)
+        if len(data) < 2:
+            return {}
+        
         # Make sure all columns are available (may not be in sample data)
         available_cols = [col for col in numeric_cols if col in data.columns]
         if len(available_cols) < 2:  # Need at least two columns for correlation
@@ -834,53 +1325,16 @@ def update_prediction(n_clicks, study_hours, teacher_quality, attendance, distan
         ])
     
     try:
+        models = get_models()
         if not models or 'jamb_xgb_regressor' not in models:
             return html.Div([
                 html.P("Prediction model not available", style={'color': 'red'})
             ])
         
-        # Create input features dataframe with all required columns
-        input_data = pd.DataFrame({
-            'Study_Hours_Per_Week': [float(study_hours)],
-            'Teacher_Quality': [float(teacher_quality)],
-            'Attendance_Rate': [float(attendance)],
-            'Distance_To_School': [float(distance)],
-            'School_Type': [str(school_type)],
-            'School_Location': [str(location)],
-            'Extra_Tutorials': [str(tutorials)],
-            'Access_To_Learning_Materials': [str(materials)],
-            'Parent_Involvement': [str(parent)],
-            'IT_Knowledge': [str(it)],
-            # Adding the missing columns with default values
-            'Parent_Education_Level': ['Secondary'],  # Default value
-            'Gender': ['Male'],  # Default value
-            'Student_ID': [1000],  # Default ID
-            'Assignments_Completed': [80],  # Default percentage
-            'Socioeconomic_Status': ['Middle'],  # Default value
-            'Age': [18],  # Default value
-            'Study_Efficiency': [0.7]  # Default value (0-1 scale)
-        })
-        
-        # Add engineered features
-        input_data['School_Quality_Index'] = float(teacher_quality) * 0.6
-        if materials == 'Yes':
-            input_data.loc[0, 'School_Quality_Index'] += 0.4
-            
-        input_data['Engagement_Level'] = float(attendance) / 20.0
-        if tutorials == 'Yes':
-            input_data.loc[0, 'Engagement_Level'] += 1.0
-        if parent == 'High':
-            input_data.loc[0, 'Engagement_Level'] += 1.0
-            
-        input_data['Distance_Barrier'] = 1.0 / (1.0 + float(distance))
-        
-        # Make predictions - handle as simple float values
-        predicted_score = float(models['jamb_xgb_regressor'].predict(input_data)[0])
-        try:
-            pass_probability = float(models['jamb_pass_classifier'].predict_proba(input_data)[0][1]) * 100
-        except (IndexError, AttributeError):
-            # Fallback if predict_proba doesn't work as expected
-            pass_probability = 70.0 if predicted_score > 200 else 30.0
+        # Form inputs go straight into the compiled predictors' feature vectors
+        inputs = form_inputs(study_hours, teacher_quality, attendance, distance,
+                             school_type, location, tutorials, materials, parent, it)
+        predicted_score, pass_probability = cached_prediction(inputs)
         
         # Determine risk level
         if predicted_score >= 250:
@@ -932,6 +1386,10 @@ def update_prediction(n_clicks, study_hours, teacher_quality, attendance, distan
             ], className="recommendations")
         ])
         
+    except ResourceTimeout:
+        return html.Div([
+            html.P("Prediction model is still loading, please try again shortly", style={'color': 'orange'})
+        ])
     except Exception as e:
         # Handle errors gracefully
         print(f"Prediction error: {e}")
@@ -940,6 +1398,194 @@ def update_prediction(n_clicks, study_hours, teacher_quality, attendance, distan
             html.P(f"Error making prediction: {str(e)}", style={'color': 'red'})
         ])
 
+# Labels for the what-if sweeps
+SENSITIVITY_LABELS = {
+    'Study_Hours_Per_Week': "Study Hours per Week",
+    'Attendance_Rate': "Attendance Rate (%)",
+    'Distance_To_School': "Distance to School (km)"
+}
+
+# Define callback for the what-if sensitivity curves
+@app.callback(
+    Output("sensitivity-curves", "figure"),
+    Output("sensitivity-curves", "style"),
+    Input("predict-button", "n_clicks"),
+    State("study-hours-input", "value"),
+    State("teacher-quality-input", "value"),
+    State("attendance-input", "value"),
+    State("distance-input", "value"),
+    State("school-type-input", "value"),
+    State("location-input", "value"),
+    State("tutorials-input", "value"),
+    State("materials-input", "value"),
+    State("parent-input", "value"),
+    State("it-input", "value"),
+    prevent_initial_call=True
+)
+def update_sensitivity(n_clicks, *form_values):
+    hidden = {'display': 'none'}
+    try:
+        models = get_models()
+        if not n_clicks or 'jamb_xgb_regressor' not in models:
+            return {}, hidden
+        
+        inputs = form_inputs(*form_values)
+        curves = sensitivity_curves(models, inputs)
+        
+        fig = make_subplots(rows=1, cols=len(SENSITIVITY_LABELS), shared_yaxes=True,
+                            subplot_titles=list(SENSITIVITY_LABELS.values()))
+        for col, (field, label) in enumerate(SENSITIVITY_LABELS.items(), start=1):
+            curve = curves[curves['Varied'] == field]
+            fig.add_trace(go.Scatter(
+                x=curve['Value'],
+                y=curve['Predicted_JAMB_Score'],
+                customdata=curve['Pass_Probability'],
+                mode='lines',
+                line=dict(color='#2563eb', width=2),
+                name=label,
+                hovertemplate=f"{label}: %{{x}}<br>Score: %{{y:.1f}}<br>Chance of 200+: %{{customdata:.1f}}%<extra></extra>"
+            ), row=1, col=col)
+            # The student's current value
+            current = curve.iloc[(curve['Value'] - inputs[field]).abs().argmin()]
+            fig.add_trace(go.Scatter(
+                x=[inputs[field]],
+                y=[current['Predicted_JAMB_Score']],
+                mode='markers',
+                marker=dict(color='#ef4444', size=10),
+                hoverinfo='skip'
+            ), row=1, col=col)
+            fig.add_hline(y=200, line_dash="dash", line_color="red", row=1, col=col)
+        
+        fig.update_layout(
+            title="What if? Predicted score as one factor changes",
+            showlegend=False,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#4b5563'),
+            title_font=dict(color='#1a3b66', size=18)
+        )
+        fig.update_yaxes(title_text="Predicted JAMB Score", row=1, col=1)
+        return fig, {'display': 'block'}
+    except ResourceTimeout:
+        return {}, hidden
+    except Exception as e:
+        print(f"Error in sensitivity callback: {e}")
+        traceback.print_exc()
+        return {}, hidden
+
+# Score an uploaded class as a background job; n_clicks and filename are left
+# out of the job key, so submitting the same contents again shares one job
+@background_callback(
+    app, background_manager,
+    Output("batch-output", "children"),
+    Output("batch-result-file", "data"),
+    Output("batch-download-button", "disabled"),
+    Input("batch-score-button", "n_clicks"),
+    State("batch-upload", "contents"),
+    State("batch-upload", "filename"),
+    running=[
+        (Output("batch-score-button", "disabled"), True, False),
+        (Output("batch-cancel-button", "disabled"), False, True)
+    ],
+    cancel=[Input("batch-cancel-button", "n_clicks")],
+    progress=[Output("batch-progress", "value"), Output("batch-progress", "max")],
+    cache_args_to_ignore=[0, 2],
+    prevent_initial_call=True
+)
+def score_uploaded_file(set_progress, n_clicks, contents, filename):
+    # The result is shared by every upload of these contents, so it does not name the file
+    if not contents:
+        return html.P("Upload a CSV file first", style={'color': 'red'}), None, True
+    try:
+        students = pd.read_csv(io.BytesIO(base64.b64decode(contents.split(',', 1)[1])))
+        features = build_feature_frame(students)
+    except (ValueError, TypeError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        return html.P(f"Could not read the uploaded file: {e}", style={'color': 'red'}), None, True
+    
+    try:
+        models = get_models()
+        if 'jamb_xgb_regressor' not in models:
+            return html.P("Prediction model not available", style={'color': 'red'}), None, True
+        
+        chunks = []
+        set_progress(("0", str(len(features))))
+        for chunk in predict_batch(models, features):
+            chunks.append(chunk)
+            set_progress((str(sum(len(c) for c in chunks)), str(len(features))))
+        results = pd.concat(chunks) if chunks else pd.DataFrame()
+        if 'Student_ID' in students.columns:
+            results.insert(0, 'Student_ID', students['Student_ID'])
+        
+        result_file = f"{fingerprint(contents, current_model_version())[:24]}.csv"
+        atomic_write_bytes(os.path.join(JOB_RESULTS_DIR, result_file), results.to_csv(index=False).encode('utf-8'))
+        
+        risk_counts = results['Risk_Level'].value_counts()
+        summary = html.Div([
+            html.H4(f"Scored {len(results):,} students from the uploaded file", className="prediction-header"),
+            html.Div([
+                html.Div([
+                    html.H2(f"{results['Predicted_JAMB_Score'].mean():.1f}"),
+                    html.P("Average Predicted Score")
+                ], className="prediction-card"),
+                html.Div([
+                    html.H2(f"{(results['Predicted_JAMB_Score'] >= 200).mean() * 100:.1f}%"),
+                    html.P("Predicted to Score 200+")
+                ], className="prediction-card"),
+                html.Div([
+                    html.H2(f"{int(risk_counts.get('High', 0)):,}", style={'color': 'red'}),
+                    html.P("High-Risk Students")
+                ], className="prediction-card")
+            ], className="prediction-results")
+        ])
+        return summary, result_file, False
+    except Exception as e:
+        print(f"Batch scoring error: {e}")
+        traceback.print_exc()
+        return html.P(f"Error scoring file: {e}", style={'color': 'red'}), None, True
+
+# Download the results of the last batch job
+@app.callback(
+    Output("batch-download", "data"),
+    Input("batch-download-button", "n_clicks"),
+    State("batch-result-file", "data"),
+    prevent_initial_call=True
+)
+def download_batch_results(n_clicks, result_file):
+    if not result_file:
+        return dash.no_update
+    path = os.path.join(JOB_RESULTS_DIR, os.path.basename(result_file))
+    if not os.path.exists(path):
+        return dash.no_update
+    return dcc.send_file(path, filename="jamb_predictions.csv")
+
+# Student explorer: filter, sort and page on the server using the student index
+@app.callback(
+    Output("student-table", "data"),
+    Output("student-table", "page_count"),
+    Output("student-count", "children"),
+    Input("student-table", "page_current"),
+    Input("student-table", "page_size"),
+    Input("student-table", "sort_by"),
+    Input("student-table", "filter_query"),
+    Input("data-version-store", "data")
+)
+def update_student_table(page_current, page_size, sort_by, filter_query, version):
+    try:
+        index = get_student_index()
+        if index is None:
+            return [], 0, "No student data available"
+        page_size = page_size or EXPLORER_PAGE_SIZE
+        rows, total = index.page(filter_query, sort_by, page_current or 0, page_size,
+                                 columns=[name for name, _ in EXPLORER_COLUMNS])
+        page_count = max(1, -(-total // page_size))
+        return rows.round(2).to_dict('records'), page_count, f"{total:,} of {index.size:,} students"
+    except ResourceTimeout:
+        return [], 1, "Student data is still loading..."
+    except Exception as e:
+        print(f"Error in student table: {e}")
+        traceback.print_exc()
+        return [], 1, f"Error loading students: {e}"
+
 try:
     # Register callbacks for the resource library
     register_callbacks(app)
@@ -947,6 +1593,12 @@ except Exception as e:
     print(f"Error registering resource library callbacks: {e}")
     traceback.print_exc()
 
+# Time every server-side callback, including the resource library's
+callback_metrics = CallbackMetrics()
+callback_metrics.instrument(app)
+callback_metrics.register_cache("figure", lambda: {"hits": figure_cache.hits, "misses": figure_cache.misses})
+callback_metrics.register_cache("prediction", prediction_cache.stats)
+
 # Register exit handler to save cache
 try:
     atexit.register(on_exit)
@@ -954,11 +1606,122 @@ except Exception as e:
     print(f"Error registering exit handler: {e}")
     traceback.print_exc()
 
+# Startup timing report: import, data, aggregate and model load times for this worker
+@server.route("/health/startup")
+def startup_report():
+    return flask.jsonify(resources.report())
+
+# Prediction cache counters for this worker
+@server.route("/health/predictions")
+def prediction_cache_report():
+    stats = prediction_cache.stats()
+    stats["table"] = resources.ready("prediction_table") and resources.get("prediction_table") is not None
+    return flask.jsonify(stats)
+
+# Callback latency, response size, error and cache metrics for this worker (Prometheus text format)
+@server.route("/metrics")
+def metrics_report():
+    return flask.Response(callback_metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@server.before_request
+def instrument_new_callbacks():
+    # Callbacks registered with dash.callback only reach callback_map on the first request
+    callback_metrics.instrument(app)
+
+# Opt-in cProfile sampling of requests (PROFILE=1, PROFILE_SAMPLE_RATE)
+init_request_profiling(server)
+
+# Batch scoring of whole classes
+@server.route("/api/predict/batch", methods=["POST"])
+def predict_batch_route():
+    """Score many students in one request
+
+    Accepts a CSV (text/csv body or a 'file' upload) or a JSON array of
+    students with the prediction-form fields. Results stream back in
+    chunks as CSV for CSV input and as NDJSON otherwise; ?format=csv or
+    ?format=ndjson overrides this.
+    """
+    try:
+        models = get_models()
+    except ResourceTimeout:
+        return flask.jsonify({"error": "Prediction model is still loading"}), 503
+    if 'jamb_xgb_regressor' not in models:
+        return flask.jsonify({"error": "Prediction model not available"}), 503
+
+    request = flask.request
+    try:
+        if 'file' in request.files:
+            students, output_format = pd.read_csv(request.files['file']), 'csv'
+        elif request.mimetype == 'text/csv':
+            students, output_format = pd.read_csv(io.BytesIO(request.get_data())), 'csv'
+        else:
+            records = request.get_json(force=True, silent=True)
+            if not isinstance(records, list):
+                raise ValueError("Expected a JSON array of students")
+            students, output_format = pd.DataFrame.from_records(records), 'ndjson'
+        # Validate and convert every row before streaming starts
+        features = build_feature_frame(students)
+    except (ValueError, TypeError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        return flask.jsonify({"error": str(e)}), 400
+
+    output_format = request.args.get('format', output_format)
+    ids = students['Student_ID'] if 'Student_ID' in students.columns else None
+
+    # Score the first chunk before the status line is sent, so a model that
+    # cannot score these rows gets an error response instead of a cut-off body
+    chunks = predict_batch(models, features)
+    try:
+        first = next(chunks, None)
+    except Exception as e:
+        print(f"Batch scoring error: {e}")
+        traceback.print_exc()
+        return flask.jsonify({"error": f"Could not score students: {e}"}), 500
+
+    def generate():
+        scored = itertools.chain([first] if first is not None else [], chunks)
+        try:
+            for i, results in enumerate(scored):
+                if ids is not None:
+                    results.insert(0, 'Student_ID', ids.loc[results.index])
+                if output_format == 'csv':
+                    yield results.to_csv(index=False, header=(i == 0))
+                else:
+                    yield results.to_json(orient='records', lines=True)
+        except Exception as e:
+            # Too late for an error status; the client sees a short body
+            print(f"Batch scoring error after streaming started: {e}")
+            traceback.print_exc()
+            raise
+
+    mimetype = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    return flask.Response(generate(), mimetype=mimetype)
+
+# Versions being served, on every response
+@server.after_request
+def add_version_headers(response):
+    response.headers["X-Data-Version"] = current_data_version(timeout=0)
+    response.headers["X-Model-Version"] = current_model_version()
+    return callback_metrics.observe_response(flask.request, response)
+
+def on_resources_reloaded(names):
+    """Drop state derived from the previous data or models"""
+    _overview_stats_cache.clear()
+    if "models" in names:
+        prediction_cache.clear()
+    print(f"Now serving data version {current_data_version(timeout=0)}, "
+          f"model version {current_model_version()}")
+
+resources.on_reload(on_resources_reloaded)
+
+resources.record("import", time.perf_counter() - IMPORT_STARTED)
+
 # Run app
 if __name__ == '__main__':
     # Get port from environment variable or use default
     port = int(os.environ.get("PORT", 8050))
     
+    resources.watch(RELOAD_INTERVAL)
+
     try:
         # Print access instructions
         print("\n" + "="*60)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:10:12 2026
+
+@author: kings
+"""
+
+# dashboard/figure_cache.py
+import os
+import sys
+import json
+import functools
+import plotly.io as pio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR
+from scripts.cache_utils import fingerprint, atomic_write_bytes, code_signature
+
+FIGURE_CACHE_DIR = os.environ.get("FIGURE_CACHE_DIR", os.path.join(CACHE_DIR, "figures"))
+
+class FigureCache:
+    """Serialized figure JSON keyed by (callback, arguments, data version)
+
+    Entries live in a directory so every gunicorn worker on the host shares
+    them; point FIGURE_CACHE_DIR at /dev/shm to keep them in memory. The
+    least recently used entries are evicted beyond max_entries, and
+    entries for other data versions can be dropped with invalidate().
+    """
+
+    def __init__(self, cache_dir=FIGURE_CACHE_DIR, max_entries=512):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, name, args, version):
+        return os.path.join(self.cache_dir, f"{version}_{name}_{fingerprint(list(args))[:24]}.json")
+
+    def get(self, name, args, version):
+        """Return the cached figure JSON string or None"""
+        path = self._path(name, args, version)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return payload
+
+    def set(self, name, args, version, payload):
+        atomic_write_bytes(self._path(name, args, version), payload.encode('utf-8'))
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, keep_version=None):
+        """Remove every entry not belonging to keep_version"""
+        removed = 0
+        for _, path in self._entries():
+            if keep_version is None or not os.path.basename(path).startswith(f"{keep_version}_"):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def memoize(self, name, version_getter, helpers=()):
+        """Decorator caching a figure callback per arguments, data version and code
+
+        The key includes the code of the callback and of the helpers it
+        calls, so entries written by an older deploy are not served after
+        the figure code changes. Only real figures are cached; the dicts
+        returned on errors are not.
+        """
+        def decorator(func):
+            code = fingerprint([code_signature(f) for f in (func,) + tuple(helpers)])[:8]
+            name_key = f"{name}_{code}"
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                version = version_getter()
+                payload = self.get(name_key, args, version)
+                if payload is not None:
+                    return json.loads(payload)
+
+                figure = func(*args)
+                if hasattr(figure, 'to_plotly_json'):
+                    self.set(name_key, args, version, pio.to_json(figure, validate=False))
+                return figure
+            return wrapper
+        return decorator
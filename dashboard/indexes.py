@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:18:05 2026
+
+@author: kings
+"""
+
+# dashboard/indexes.py
+import re
+import numpy as np
+import pandas as pd
+
+# Text columns with more distinct values than this are not indexed
+MAX_INDEXED_CATEGORIES = 100
+
+# One clause of a DataTable filter_query, e.g. {School_Type} scontains Public or {JAMB_Score} >= 200
+FILTER_CLAUSE = re.compile(r"^\{(?P<column>[^}]+)\}\s+(?P<operator>[a-z]+|[<>!=]=?)\s+(?P<value>.+)$")
+
+OPERATOR_ALIASES = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+
+def parse_filter_query(query):
+    """Split a DataTable filter_query into (column, operator, value) clauses"""
+    clauses = []
+    for part in (query or "").split(" && "):
+        match = FILTER_CLAUSE.match(part.strip())
+        if not match:
+            continue
+        value = match.group('value').strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        operator = OPERATOR_ALIASES.get(match.group('operator'), match.group('operator'))
+        clauses.append((match.group('column'), operator, value))
+    return clauses
+
+class StudentIndex:
+    """Indexes over the student table, built once per data version
+
+    Every low-cardinality text column gets one bitmap per category, and
+    JAMB_Score gets a sorted order so score ranges are two binary searches.
+    Filters combine bitmaps with AND instead of comparing every row, and
+    only the requested page of rows is materialized.
+    """
+
+    def __init__(self, data, score_column='JAMB_Score'):
+        self.data = data
+        self.score_column = score_column
+        self.size = len(data)
+
+        # column -> {category: bitmap of rows}
+        self.categories = {}
+        for column in data.columns:
+            if pd.api.types.is_numeric_dtype(data[column]):
+                continue
+            codes, uniques = pd.factorize(data[column], sort=True)
+            if len(uniques) > MAX_INDEXED_CATEGORIES:
+                continue
+            self.categories[column] = {str(value): codes == i for i, value in enumerate(uniques)}
+
+        # Sorted orders per column; the score order is built up front
+        self._orders = {}
+        if score_column in data.columns:
+            self.sorted_scores = data[score_column].to_numpy()[self.order(score_column)]
+
+    def order(self, column):
+        """Row positions sorted ascending by column (cached)"""
+        if column not in self._orders:
+            values = self.data[column]
+            if pd.api.types.is_numeric_dtype(values):
+                values = values.to_numpy()
+            else:
+                # Sort text by category code so missing values and mixed types are handled
+                values = pd.factorize(values, sort=True)[0]
+            self._orders[column] = np.argsort(values, kind='stable')
+        return self._orders[column]
+
+    def _positions_bitmap(self, positions):
+        bitmap = np.zeros(self.size, dtype=bool)
+        bitmap[positions] = True
+        return bitmap
+
+    def _score_bitmap(self, operator, value):
+        order, scores = self.order(self.score_column), self.sorted_scores
+        left, right = np.searchsorted(scores, value, 'left'), np.searchsorted(scores, value, 'right')
+        if operator in ('>', '>='):
+            positions = order[right if operator == '>' else left:]
+        elif operator in ('<', '<='):
+            positions = order[:left if operator == '<' else right]
+        else:
+            positions = order[left:right]
+        bitmap = self._positions_bitmap(positions)
+        return ~bitmap if operator == '!=' else bitmap
+
+    def _union(self, column, categories):
+        """Bitmap of rows whose column is any of the given categories"""
+        bitmaps = self.categories[column]
+        result = np.zeros(self.size, dtype=bool)
+        for category in categories:
+            if category in bitmaps:
+                result |= bitmaps[category]
+        return result
+
+    def _category_bitmap(self, column, operator, value):
+        bitmaps = self.categories[column]
+        if operator == '=':
+            matching = [value] if value in bitmaps else []
+        elif operator == '!=':
+            matching = [c for c in bitmaps if c != value]
+        elif operator == 'scontains':
+            matching = [c for c in bitmaps if value in c]
+        else:
+            matching = [c for c in bitmaps if value.lower() in c.lower()]
+        return self._union(column, matching)
+
+    def _column_bitmap(self, column, operator, value):
+        """Fallback for columns without an index: compare the column directly"""
+        values = self.data[column]
+        if pd.api.types.is_numeric_dtype(values):
+            value = float(value)
+            compare = {'=': values.eq, '!=': values.ne, '<': values.lt, '<=': values.le,
+                       '>': values.gt, '>=': values.ge}.get(operator, values.eq)
+            return compare(value).to_numpy()
+        text = values.astype(str)
+        if operator == '=':
+            return (text == value).to_numpy()
+        return text.str.contains(value, case=operator == 'scontains', regex=False).to_numpy()
+
+    def filter(self, query):
+        """Bitmap of rows matching a DataTable filter_query, or None for no filter"""
+        selected = None
+        for column, operator, value in parse_filter_query(query):
+            if column not in self.data.columns:
+                continue
+            try:
+                if column == self.score_column and operator in ('=', '!=', '<', '<=', '>', '>='):
+                    bitmap = self._score_bitmap(operator, float(value))
+                elif column in self.categories:
+                    bitmap = self._category_bitmap(column, operator, value)
+                else:
+                    bitmap = self._column_bitmap(column, operator, value)
+            except ValueError:
+                # A half-typed number matches nothing
+                bitmap = np.zeros(self.size, dtype=bool)
+            selected = bitmap if selected is None else selected & bitmap
+        return selected
+
+    def select(self, filters):
+        """Bitmap of rows matching {column: [categories]} cross-filters, or None for no filter
+
+        Categories of one column are ORed together and columns are ANDed.
+        """
+        selected = None
+        for column, categories in (filters or {}).items():
+            if not categories or column not in self.categories:
+                continue
+            bitmap = self._union(column, categories)
+            selected = bitmap if selected is None else selected & bitmap
+        return selected
+
+    def page(self, query=None, sort_by=None, page_current=0, page_size=25, columns=None):
+        """One page of matching rows in the requested order, and the number of matches"""
+        selected = self.filter(query)
+        if sort_by and sort_by[0]['column_id'] in self.data.columns:
+            order = self.order(sort_by[0]['column_id'])
+            if sort_by[0]['direction'] == 'desc':
+                order = order[::-1]
+            positions = order if selected is None else order[selected[order]]
+        else:
+            positions = np.arange(self.size) if selected is None else np.flatnonzero(selected)
+
+        start = page_current * page_size
+        rows = self.data.iloc[positions[start:start + page_size]]
+        if columns is not None:
+            rows = rows[[c for c in columns if c in rows.columns]]
+        return rows, len(positions)
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:14:08 2026
+
+@author: kings
+"""
+
+# dashboard/inference.py
+import io
+import os
+import sys
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR
+from scripts.cache_utils import atomic_write_bytes
+
+# Fields of the prediction form, with the type each is converted to
+FORM_FIELDS = {
+    'Study_Hours_Per_Week': float,
+    'Teacher_Quality': float,
+    'Attendance_Rate': float,
+    'Distance_To_School': float,
+    'School_Type': str,
+    'School_Location': str,
+    'Extra_Tutorials': str,
+    'Access_To_Learning_Materials': str,
+    'Parent_Involvement': str,
+    'IT_Knowledge': str
+}
+
+# Model inputs the form does not ask for
+FORM_DEFAULTS = {
+    'Parent_Education_Level': 'Secondary',
+    'Gender': 'Male',
+    'Student_ID': 1000,
+    'Assignments_Completed': 80,
+    'Socioeconomic_Status': 'Middle',
+    'Age': 18,
+    'Study_Efficiency': 0.7
+}
+
+# Students are scored in chunks of this many rows
+DEFAULT_CHUNK_SIZE = 5000
+
+# Predictions remembered per worker
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 4096))
+
+# Values the prediction form can produce, in FORM_FIELDS order. Distance is
+# continuous and is rounded to the nearest TABLE_DISTANCE_STEP in the table.
+TABLE_DISTANCE_STEP = 2.5
+FORM_GRID = {
+    'Study_Hours_Per_Week': np.arange(0, 41, 1.0),
+    'Teacher_Quality': np.arange(1, 6, 1.0),
+    'Attendance_Rate': np.arange(50, 101, 5.0),
+    'Distance_To_School': np.arange(0, 20 + TABLE_DISTANCE_STEP, TABLE_DISTANCE_STEP),
+    'School_Type': ['Public', 'Private'],
+    'School_Location': ['Urban', 'Rural'],
+    'Extra_Tutorials': ['Yes', 'No'],
+    'Access_To_Learning_Materials': ['Yes', 'No'],
+    'Parent_Involvement': ['Low', 'Medium', 'High'],
+    'IT_Knowledge': ['Low', 'Medium', 'High']
+}
+
+PREDICTION_TABLE_DIR = os.path.join(CACHE_DIR, "prediction_table")
+
+# Values each numeric input is swept across for the what-if curves (the form's slider ranges)
+SENSITIVITY_SWEEPS = {
+    'Study_Hours_Per_Week': np.arange(0, 41, 1.0),
+    'Attendance_Rate': np.arange(50, 101, 5.0),
+    'Distance_To_School': np.round(np.linspace(0.1, 20, 40), 1)
+}
+
+def form_inputs(*values):
+    """Map prediction-form values, in FORM_FIELDS order, to typed inputs"""
+    return {field: kind(value) for (field, kind), value in zip(FORM_FIELDS.items(), values)}
+
+def add_engineered_features(values):
+    """Derive the engineered model inputs; works on a dict of scalars or a DataFrame"""
+    values['School_Quality_Index'] = (values['Teacher_Quality'] * 0.6
+                                      + 0.4 * (values['Access_To_Learning_Materials'] == 'Yes'))
+    values['Engagement_Level'] = (values['Attendance_Rate'] / 20.0
+                                  + (values['Extra_Tutorials'] == 'Yes')
+                                  + (values['Parent_Involvement'] == 'High'))
+    values['Distance_Barrier'] = 1.0 / (1.0 + values['Distance_To_School'])
+    return values
+
+def build_feature_frame(students):
+    """Model input frame for a table of students with the form fields
+
+    Missing optional inputs take FORM_DEFAULTS; the engineered features
+    are derived for all rows at once. Rows without a value for one of the
+    form fields are rejected rather than scored with 'nan' categories.
+    """
+    missing = [field for field in FORM_FIELDS if field not in students.columns]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    incomplete = students[list(FORM_FIELDS)].isna()
+    if incomplete.any(axis=None):
+        # 1-based positions of the students, as a reader of the file counts them
+        rows = np.flatnonzero(incomplete.any(axis=1).to_numpy()) + 1
+        fields = [field for field in FORM_FIELDS if incomplete[field].any()]
+        shown = ', '.join(map(str, rows[:10])) + (', ...' if len(rows) > 10 else '')
+        raise ValueError(f"No value for {', '.join(fields)} in {len(rows)} of {len(students)} students "
+                         f"(students {shown})")
+
+    features = pd.DataFrame({
+        field: students[field].astype(kind) for field, kind in FORM_FIELDS.items()
+    })
+    for column, default in FORM_DEFAULTS.items():
+        features[column] = students[column].fillna(default) if column in students.columns else default
+    return add_engineered_features(features)
+
+def risk_levels(scores):
+    """Risk level for each predicted score"""
+    return np.select([scores >= 250, scores >= 200], ["Low", "Medium"], default="High")
+
+def predict_scores(models, features):
+    """Predicted scores and pass probabilities (%) for each row, unrounded"""
+    scores = np.asarray(models['jamb_xgb_regressor'].predict(features), dtype=float)
+    try:
+        pass_probability = models['jamb_pass_classifier'].predict_proba(features)[:, 1] * 100
+    except (IndexError, AttributeError, KeyError):
+        # Same fallback as the prediction form when no usable classifier exists
+        pass_probability = np.where(scores > 200, 70.0, 30.0)
+    return scores, pass_probability
+
+def predict_frame(models, features):
+    """Predicted score, pass probability (%) and risk level for each row"""
+    scores, pass_probability = predict_scores(models, features)
+    return pd.DataFrame({
+        'Predicted_JAMB_Score': scores.round(1),
+        'Pass_Probability': np.asarray(pass_probability, dtype=float).round(1),
+        'Risk_Level': risk_levels(scores)
+    }, index=features.index)
+
+def predict_batch(models, features, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield prediction frames chunk by chunk, one model call per chunk and model"""
+    for start in range(0, len(features), chunk_size):
+        yield predict_frame(models, features.iloc[start:start + chunk_size])
+
+class CompiledPredictor:
+    """Single-row inference for a fitted one-hot ColumnTransformer + estimator pipeline
+
+    The column layout is read once from the fitted transformer: the one-hot
+    position of every category and the position of every passthrough
+    column. A row is then written straight into a copy of a preallocated
+    vector that already holds FORM_DEFAULTS, and the final estimator is
+    called on it, skipping DataFrame construction and the pipeline's input
+    validation. Random forests are evaluated tree by tree, as sklearn does.
+    Results are identical to pipeline.predict / predict_proba.
+    """
+
+    def __init__(self, pipeline, defaults=FORM_DEFAULTS):
+        # Imported here so importing the dashboard does not pay for sklearn;
+        # predictors are compiled in the background loader thread
+        from sklearn.compose import ColumnTransformer
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+        from sklearn.preprocessing import OneHotEncoder
+
+        steps = getattr(pipeline, 'steps', None)
+        if not steps or len(steps) != 2 or not isinstance(steps[0][1], ColumnTransformer):
+            raise ValueError("Only ColumnTransformer + estimator pipelines can be compiled")
+        preprocessor, self.estimator = steps[0][1], steps[1][1]
+        columns = list(pipeline.feature_names_in_)
+
+        # column -> (start, stop, {category: position}) / column -> position
+        self._one_hot = {}
+        self._numeric = {}
+        position = 0
+        for _, transformer, selected in preprocessor.transformers_:
+            if isinstance(transformer, str) and transformer == 'drop':
+                continue
+            selected = [columns[c] if isinstance(c, (int, np.integer)) else c for c in selected]
+            if self._is_passthrough(transformer):
+                for column in selected:
+                    self._numeric[column] = position
+                    position += 1
+            elif (isinstance(transformer, OneHotEncoder) and transformer.handle_unknown == 'ignore'
+                  and transformer.drop_idx_ is None and not transformer._infrequent_enabled):
+                for column, categories in zip(selected, transformer.categories_):
+                    lookup = {c: position + i for i, c in enumerate(categories) if isinstance(c, str)}
+                    self._one_hot[column] = (position, position + len(categories), lookup)
+                    position += len(categories)
+            else:
+                raise ValueError(f"Cannot compile transformer {transformer!r}")
+
+        if position != getattr(self.estimator, 'n_features_in_', position):
+            raise ValueError("Compiled layout does not match the estimator's inputs")
+        self.columns = columns
+        self._template = np.zeros((1, position))
+        self._fill(self._template, defaults)
+        self._trees = self.estimator.estimators_ if isinstance(
+            self.estimator, (RandomForestClassifier, RandomForestRegressor)) else None
+
+    @staticmethod
+    def _is_passthrough(transformer):
+        from sklearn.preprocessing import FunctionTransformer
+
+        if isinstance(transformer, str):
+            return transformer == 'passthrough'
+        # A fitted 'passthrough' remainder is an identity FunctionTransformer
+        return isinstance(transformer, FunctionTransformer) and transformer.func is None
+
+    def _fill(self, vector, values):
+        for column, value in values.items():
+            if column in self._numeric:
+                vector[0, self._numeric[column]] = value
+            elif column in self._one_hot:
+                start, stop, lookup = self._one_hot[column]
+                vector[0, start:stop] = 0.0
+                if value in lookup:
+                    vector[0, lookup[value]] = 1.0
+
+    def transform(self, values):
+        """Model-ready feature vector for one student's inputs"""
+        vector = self._template.copy()
+        self._fill(vector, values)
+        return vector
+
+    def predict(self, values):
+        """Prediction for one student"""
+        vector = self.transform(values)
+        if self._trees is not None:
+            vector = vector.astype(np.float32)
+            return sum(tree.predict(vector, check_input=False) for tree in self._trees)[0] / len(self._trees)
+        return self.estimator.predict(vector)[0]
+
+    def predict_proba(self, values):
+        """Class probabilities for one student"""
+        vector = self.transform(values)
+        if self._trees is not None:
+            vector = vector.astype(np.float32)
+            proba = sum(tree.predict_proba(vector, check_input=False) for tree in self._trees)
+            return (proba / len(self._trees))[0]
+        return self.estimator.predict_proba(vector)[0]
+
+def compile_models(models):
+    """Compiled single-row predictors for every model that supports it"""
+    predictors = {}
+    for name, model in models.items():
+        try:
+            predictors[name] = CompiledPredictor(model)
+        except (ValueError, AttributeError) as e:
+            print(f"Using the pipeline for {name}: {e}")
+    return predictors
+
+def predict_one(models, predictors, values):
+    """Predicted score and pass probability (%) for one student's form inputs"""
+    values = add_engineered_features(dict(values))
+    features = None
+    if 'jamb_xgb_regressor' in predictors:
+        score = float(predictors['jamb_xgb_regressor'].predict(values))
+    else:
+        features = build_feature_frame(pd.DataFrame([values]))
+        score = float(models['jamb_xgb_regressor'].predict(features)[0])
+
+    try:
+        if 'jamb_pass_classifier' in predictors:
+            pass_probability = float(predictors['jamb_pass_classifier'].predict_proba(values)[1]) * 100
+        else:
+            if features is None:
+                features = build_feature_frame(pd.DataFrame([values]))
+            pass_probability = float(models['jamb_pass_classifier'].predict_proba(features)[0][1]) * 100
+    except (IndexError, AttributeError, KeyError):
+        # Fallback if predict_proba doesn't work as expected
+        pass_probability = 70.0 if score > 200 else 30.0
+    return score, pass_probability
+
+def sensitivity_curves(models, values, sweeps=SENSITIVITY_SWEEPS):
+    """Predicted score and pass probability as each swept input varies, all else fixed
+
+    Every variant of every sweep is scored in one batch per model.
+    """
+    variants = []
+    for field, levels in sweeps.items():
+        variant = pd.DataFrame({name: [value] * len(levels) for name, value in values.items()
+                                if name in FORM_FIELDS})
+        variant[field] = levels
+        variant['Varied'] = field
+        variants.append(variant)
+    variants = pd.concat(variants, ignore_index=True)
+
+    scores, pass_probability = predict_scores(models, build_feature_frame(variants))
+    return pd.DataFrame({
+        'Varied': variants['Varied'],
+        'Value': [row[field] for row, field in zip(variants.to_dict('records'), variants['Varied'])],
+        'Predicted_JAMB_Score': scores,
+        'Pass_Probability': pass_probability
+    })
+
+class PredictionCache:
+    """Bounded LRU of (score, pass probability) keyed by model version and form inputs"""
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_version, values):
+        return (model_version,) + tuple(values[field] for field in FORM_FIELDS)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+class PredictionTable:
+    """Predictions for every combination of prediction-form values
+
+    Built offline (scripts/build_prediction_table.py) for one model
+    version. Distance is snapped to the nearest grid level, so a lookup
+    is an approximation for distances between levels; inputs off the grid
+    return None and are predicted normally.
+    """
+
+    def __init__(self, grid, scores, probabilities, model_version):
+        self.grid = grid
+        self.scores = scores
+        self.probabilities = probabilities
+        self.model_version = model_version
+        self.shape = tuple(len(levels) for levels in grid.values())
+        self._positions = {
+            field: {level: i for i, level in enumerate(levels)}
+            for field, levels in grid.items() if field != 'Distance_To_School'
+        }
+
+    @classmethod
+    def build(cls, models, model_version, grid=FORM_GRID, chunk_size=50000):
+        """Predict the whole grid in batches"""
+        grid = {field: list(map(FORM_FIELDS[field], levels)) for field, levels in grid.items()}
+        shape = tuple(len(levels) for levels in grid.values())
+        size = int(np.prod(shape))
+        scores = np.empty(size, dtype=np.float32)
+        probabilities = np.empty(size, dtype=np.float32)
+        for start in range(0, size, chunk_size):
+            stop = min(start + chunk_size, size)
+            indices = np.unravel_index(np.arange(start, stop), shape)
+            students = pd.DataFrame({
+                field: np.asarray(levels, dtype=object if FORM_FIELDS[field] is str else float)[index]
+                for (field, levels), index in zip(grid.items(), indices)
+            })
+            scores[start:stop], probabilities[start:stop] = predict_scores(models, build_feature_frame(students))
+        return cls(grid, scores, probabilities, model_version)
+
+    def lookup(self, values):
+        """(score, pass probability) for the form inputs, or None if they are off the grid"""
+        index = []
+        for field, levels in self.grid.items():
+            if field == 'Distance_To_School':
+                step = levels[1] - levels[0]
+                position = int(round((values[field] - levels[0]) / step))
+                if position < 0 or position >= len(levels):
+                    return None
+            else:
+                position = self._positions[field].get(values[field])
+                if position is None:
+                    return None
+            index.append(position)
+        flat = np.ravel_multi_index(index, self.shape)
+        return float(self.scores[flat]), float(self.probabilities[flat])
+
+    @staticmethod
+    def path(model_version, table_dir=PREDICTION_TABLE_DIR):
+        return os.path.join(table_dir, f"prediction_table_{model_version}.npz")
+
+    def save(self, table_dir=PREDICTION_TABLE_DIR):
+        path = self.path(self.model_version, table_dir)
+        buffer = io.BytesIO()
+        np.savez(buffer, scores=self.scores, probabilities=self.probabilities,
+                 grid=np.frombuffer(json.dumps(self.grid).encode('utf-8'), dtype=np.uint8))
+        atomic_write_bytes(path, buffer.getvalue())
+        return path
+
+    @classmethod
+    def load(cls, model_version, table_dir=PREDICTION_TABLE_DIR):
+        """The table for this model version, or None if none was built"""
+        path = cls.path(model_version, table_dir)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as stored:
+            grid = json.loads(stored['grid'].tobytes().decode('utf-8'))
+            return cls(grid, stored['scores'], stored['probabilities'], model_version)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 22:31:50 2026
+
+@author: kings
+"""
+
+# dashboard/jobs.py
+#
+# Long-running dashboard work (batch scoring, reports) runs as Dash
+# background callbacks: each job is started in its own worker process and
+# its progress and result are kept in a disk cache shared by all gunicorn
+# workers, so the request thread returns immediately and the browser polls
+# for progress. Jobs can be cancelled, and an identical request (same
+# inputs and cache_by values) joins the job already running for it or
+# reuses its finished result until that expires.
+import os
+import sys
+import functools
+from dash import DiskcacheManager
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR
+
+JOB_CACHE_DIR = os.environ.get("JOB_CACHE_DIR", os.path.join(CACHE_DIR, "jobs"))
+JOB_RESULTS_DIR = os.path.join(JOB_CACHE_DIR, "results")
+
+# Seconds a finished job's result is reused for identical requests
+JOB_RESULT_EXPIRE = int(os.environ.get("JOB_RESULT_EXPIRE", 3600))
+
+# Stands in for a job process when a finished result is reused; negative
+# pids are never running, so Dash has nothing to poll or terminate
+NO_JOB = -1
+
+class SharedJobManager(DiskcacheManager):
+    """DiskcacheManager that starts at most one job per cache key
+
+    Dash starts a new process for every request and only afterwards finds
+    the cached result. Here a request whose result is already stored, or
+    whose job is still running, gets that job instead of a new one.
+    """
+
+    def _job_key(self, key):
+        return f"{key}-job"
+
+    def _reusable(self, key):
+        result = self.handle.get(key)
+        # Failed jobs are run again
+        return result is not None and not (isinstance(result, dict) and "background_callback_error" in result)
+
+    def call_job_fn(self, key, job_fn, args, context):
+        import diskcache
+
+        # A cache-backed lock rather than a transaction: the job is forked
+        # while it is held and must not inherit an open transaction
+        with diskcache.Lock(self.handle, f"{key}-lock", expire=30):
+            if self._reusable(key):
+                return NO_JOB
+            job = self.handle.get(self._job_key(key))
+            if job is not None and self.job_running(job):
+                return job
+            job = super().call_job_fn(key, job_fn, args, context)
+            self.handle.set(self._job_key(key), job, expire=self.expire)
+        return job
+
+def create_background_manager(cache_by=None, cache_dir=JOB_CACHE_DIR):
+    """Disk-cache backed manager for background callbacks, or None without diskcache"""
+    try:
+        import diskcache
+    except ImportError:
+        print("diskcache is not installed; long-running callbacks will run in the request thread")
+        return None
+    return SharedJobManager(diskcache.Cache(cache_dir), cache_by=cache_by, expire=JOB_RESULT_EXPIRE)
+
+def background_callback(app, manager, *dependencies, progress=None, cancel=None, cache_args_to_ignore=None,
+                        **kwargs):
+    """Register a callback as a background job when a manager is available
+
+    The decorated function receives set_progress as its first argument,
+    as Dash background callbacks do. Without a manager the callback runs
+    synchronously; set_progress then does nothing and cancel is ignored.
+    cache_args_to_ignore lists the positions (not counting set_progress) of
+    arguments that do not change the result, such as n_clicks, so repeated
+    requests share one job.
+    """
+    if manager is not None:
+        return app.callback(*dependencies, background=True, manager=manager,
+                            progress=progress, cancel=cancel,
+                            cache_args_to_ignore=cache_args_to_ignore, **kwargs)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def synchronous(*args):
+            return func(lambda value: None, *args)
+        app.callback(*dependencies, **kwargs)(synchronous)
+        return func
+    return decorator
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:52:27 2026
+
+@author: kings
+"""
+
+# dashboard/metrics.py
+#
+# Per-callback instrumentation exposed in the Prometheus text format.
+# Every entry of app.callback_map is wrapped so its latency and uncaught
+# errors are recorded, and response sizes are taken from the responses to
+# _dash-update-component. Counters live in the worker process; with several
+# gunicorn workers each scrape sees the worker that served it.
+import time
+import inspect
+import functools
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from dash.exceptions import PreventUpdate
+
+# Upper bounds of the histogram buckets (seconds and bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+
+CALLBACK_PATH = "/_dash-update-component"
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum, as Prometheus expects"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+class CallbackMetrics:
+    """Latency, response size, error and cache counters for the dashboard
+
+    Recording is a perf_counter pair, a bisect and a few increments under
+    a lock, so it adds microseconds to callbacks that take milliseconds.
+    """
+
+    def __init__(self):
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.sizes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.errors = defaultdict(int)
+        self.caches = {}
+        self._lock = threading.Lock()
+        self._instrumented = 0
+
+    def observe(self, callback, seconds, failed=False):
+        with self._lock:
+            self.latency[callback].observe(seconds)
+            if failed:
+                self.errors[callback] += 1
+
+    def _wrap(self, callback, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed(*args, **kwargs):
+                started, failed = time.perf_counter(), False
+                try:
+                    return await func(*args, **kwargs)
+                except PreventUpdate:
+                    raise
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    self.observe(callback, time.perf_counter() - started, failed)
+        else:
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                started, failed = time.perf_counter(), False
+                try:
+                    return func(*args, **kwargs)
+                except PreventUpdate:
+                    raise
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    self.observe(callback, time.perf_counter() - started, failed)
+        timed.instrumented = True
+        return timed
+
+    def instrument(self, app):
+        """Wrap every server-side callback registered on app that is not wrapped yet
+
+        Safe to call repeatedly; callbacks registered with dash.callback are
+        only merged into callback_map on the first request.
+        """
+        if len(app.callback_map) == self._instrumented:
+            return
+        for callback, entry in list(app.callback_map.items()):
+            func = entry.get("callback")
+            if func is not None and not getattr(func, "instrumented", False):
+                entry["callback"] = self._wrap(callback, func)
+        self._instrumented = len(app.callback_map)
+
+    def observe_response(self, request, response):
+        """Record the size of a callback response (used as an after_request hook)"""
+        if request.path.endswith(CALLBACK_PATH) and not response.is_streamed:
+            body = request.get_json(silent=True) or {}
+            size = response.content_length
+            if size is not None and body.get("output"):
+                with self._lock:
+                    self.sizes[body["output"]].observe(size)
+        return response
+
+    def register_cache(self, name, stats):
+        """Report a cache's hit and miss counters; stats() returns a dict with hits and misses"""
+        self.caches[name] = stats
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            latency, sizes, errors = dict(self.latency), dict(self.sizes), dict(self.errors)
+
+            lines = ["# HELP dash_callback_duration_seconds Time spent in a Dash callback",
+                     "# TYPE dash_callback_duration_seconds histogram"]
+            for callback, histogram in sorted(latency.items()):
+                lines.extend(histogram.lines("dash_callback_duration_seconds", f'callback="{_label(callback)}"'))
+
+            lines += ["# HELP dash_callback_response_bytes Size of Dash callback responses",
+                      "# TYPE dash_callback_response_bytes histogram"]
+            for callback, histogram in sorted(sizes.items()):
+                lines.extend(histogram.lines("dash_callback_response_bytes", f'callback="{_label(callback)}"'))
+
+        lines += ["# HELP dash_callback_errors_total Uncaught exceptions raised by a Dash callback",
+                  "# TYPE dash_callback_errors_total counter"]
+        for callback in sorted(latency):
+            lines.append(f'dash_callback_errors_total{{callback="{_label(callback)}"}} {errors.get(callback, 0)}')
+
+        for kind in ("hits", "misses"):
+            lines += [f"# HELP dashboard_cache_{kind}_total Cache {kind} in this worker",
+                      f"# TYPE dashboard_cache_{kind}_total counter"]
+            for name, stats in sorted(self.caches.items()):
+                try:
+                    value = stats()[kind]
+                except Exception as e:
+                    print(f"Error collecting {name} cache metrics: {e}")
+                    continue
+                lines.append(f'dashboard_cache_{kind}_total{{cache="{_label(name)}"}} {value}')
+        return "\n".join(lines) + "\n"
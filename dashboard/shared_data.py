@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:02:36 2026
+
+@author: kings
+"""
+
+# dashboard/shared_data.py
+#
+# Columnar, memory-mapped copy of the processed data. Each numeric column
+# is stored as a .npy file and each text column as integer codes plus a
+# list of categories. Workers map the files read-only, so the column data
+# lives once in the OS page cache however many gunicorn workers are
+# running. Point SHARED_DATA_DIR at /dev/shm to keep it in shared memory.
+import os
+import sys
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR
+from scripts.cache_utils import fingerprint, atomic_write_bytes
+
+SHARED_DATA_DIR = os.environ.get("SHARED_DATA_DIR", os.path.join(CACHE_DIR, "columnar"))
+
+def source_signature(path):
+    """Identify a source file by its size and modification time"""
+    stat = os.stat(path)
+    return fingerprint(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)[:16]
+
+def export_columnar(data, directory):
+    """Write a DataFrame as one .npy file per column plus a metadata file"""
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for i, name in enumerate(data.columns):
+        column = data[name]
+        file_name = f"col_{i:03d}.npy"
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            np.save(os.path.join(directory, file_name), column.to_numpy())
+            columns.append({'name': name, 'file': file_name, 'kind': 'numeric'})
+        else:
+            codes, categories = pd.factorize(column, sort=True)
+            dtype = np.int8 if len(categories) < 127 else np.int32
+            np.save(os.path.join(directory, file_name), codes.astype(dtype))
+            columns.append({'name': name, 'file': file_name, 'kind': 'category',
+                            'categories': [str(c) for c in categories]})
+    meta = {'rows': len(data), 'columns': columns}
+    # Written last: a directory with meta.json is complete
+    atomic_write_bytes(os.path.join(directory, 'meta.json'), json.dumps(meta).encode('utf-8'))
+
+def load_columnar(directory):
+    """Map a columnar export read-only as a DataFrame; None if it is missing"""
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    columns = {}
+    for column in meta['columns']:
+        values = np.load(os.path.join(directory, column['file']), mmap_mode='r')
+        if column['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=column['categories'])
+        columns[column['name']] = values
+    return pd.DataFrame(columns, copy=False)
+
+def load_shared_csv(csv_path, shared_dir=SHARED_DATA_DIR):
+    """Return the CSV as a memory-mapped DataFrame, exporting it on first use
+
+    Exports are kept per source version; a concurrent export by another
+    worker is harmless because the completed directory is renamed into place.
+    """
+    target = os.path.join(shared_dir, source_signature(csv_path))
+    data = load_columnar(target)
+    if data is not None:
+        return data
+
+    tmp_dir = f"{target}.{os.getpid()}.tmp"
+    export_columnar(pd.read_csv(csv_path), tmp_dir)
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        # Another worker finished first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Drop exports of older versions of the file
+    for entry in os.scandir(shared_dir):
+        if entry.is_dir() and entry.path != target and not entry.name.endswith('.tmp'):
+            shutil.rmtree(entry.path, ignore_errors=True)
+    return load_columnar(target)
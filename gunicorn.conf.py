@@ -0,0 +1,35 @@
+# gunicorn.conf.py
+#
+# Serving configuration for `gunicorn -c gunicorn.conf.py dashboard.app:server`.
+#
+# With PRELOAD_APP=1 (the default) the master imports the app and loads the
+# data, aggregates and models once before forking, and the workers share
+# those pages copy-on-write. gc.freeze() keeps the garbage collector from
+# touching (and so copying) the preloaded objects in every worker. The data
+# itself is served from a memory-mapped columnar copy (SHARED_DATA=1), which
+# stays shared even if a worker is restarted later.
+#
+# Data and model changes are picked up without a restart (RELOAD_INTERVAL).
+# Workers default to $WEB_CONCURRENCY and the bind address to $PORT.
+import os
+import gc
+
+preload_app = os.environ.get("PRELOAD_APP", "1") == "1"
+
+os.environ.setdefault("SHARED_DATA", "1")
+
+def when_ready(server):
+    """Finish loading in the master before the first worker is forked"""
+    if not preload_app:
+        return
+    from dashboard.app import resources
+    resources.wait_all(timeout=float(os.environ.get("PRELOAD_TIMEOUT", 300)))
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded resources: {resources.report()['timings']}")
+
+def post_fork(server, worker):
+    """Start the data/model watcher in each worker; the master never runs one"""
+    from dashboard.app import resources
+    from dashboard.loader import RELOAD_INTERVAL
+    resources.watch(RELOAD_INTERVAL)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:40:51 2026
+
+@author: kings
+"""
+
+# scripts/aggregates.py
+import os
+import sys
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR
+from scripts.cache_utils import fingerprint, atomic_write_bytes, code_signature
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_CACHE_DIR = os.path.join(CACHE_DIR, "aggregates")
+
+# Score thresholds shared by the reports and the dashboard
+PASS_THRESHOLD = 200
+TOP_PERFORMER_THRESHOLD = 250
+
+# Categorical columns the cube is grouped by
+CUBE_DIMENSIONS = [
+    'School_Type', 'School_Location', 'Gender', 'Socioeconomic_Status',
+    'Parent_Involvement', 'Extra_Tutorials', 'Access_To_Learning_Materials',
+    'IT_Knowledge'
+]
+
+# One histogram bin per JAMB point, so quantiles from the cube are accurate to within a point
+SCORE_RANGE = (0, 400)
+SCORE_BIN_WIDTH = 1
+
+# Numeric factors whose least-squares trendline against the score is kept in the cube
+TREND_FACTORS = ['Study_Hours_Per_Week', 'Teacher_Quality', 'Distance_To_School', 'Attendance_Rate']
+
+MISSING_CATEGORY = 'Unknown'
+
+# Bumped whenever the stored cube layout changes
+CUBE_FORMAT = 2
+
+def data_version(data):
+    """Short content hash identifying a version of the data"""
+    return fingerprint(data)[:16]
+
+def cube_code_version():
+    """Short hash of the thresholds and build code a stored cube's contents depend on"""
+    return fingerprint(PASS_THRESHOLD, TOP_PERFORMER_THRESHOLD, code_signature(AggregateCube.build))[:8]
+
+class AggregateCube:
+    """Score aggregates for every observed combination of the cube dimensions
+
+    Each cell holds the student count, sum and sum of squares of JAMB
+    scores, pass and top-performer counts, min/max and a score histogram,
+    plus the moments of each trend factor needed for a closed-form
+    least-squares fit. Any slice or breakdown is answered from the cells alone.
+    """
+
+    def __init__(self, cells, histograms, bin_edges, dimensions, version, trend_factors=()):
+        self.cells = cells
+        self.histograms = histograms
+        self.bin_edges = bin_edges
+        self.dimensions = dimensions
+        self.version = version
+        self.trend_factors = list(trend_factors)
+
+    @classmethod
+    def build(cls, data, dimensions=None, version=None, score_column='JAMB_Score'):
+        """Build the cube in one pass over the data"""
+        dimensions = [d for d in (dimensions or CUBE_DIMENSIONS) if d in data.columns]
+        trend_factors = [f for f in TREND_FACTORS if f in data.columns]
+        frame = data[dimensions + [score_column]].copy()
+        for dim in dimensions:
+            # Through object so memory-mapped categorical columns can take the new category
+            frame[dim] = frame[dim].astype(object).fillna(MISSING_CATEGORY).astype(str)
+        scores = frame[score_column].to_numpy(dtype=float)
+
+        grouped = frame.groupby(dimensions, sort=True) if dimensions else None
+        cell_ids = grouped.ngroup().to_numpy() if grouped is not None else np.zeros(len(frame), dtype=int)
+        n_cells = int(cell_ids.max()) + 1 if len(frame) else 0
+
+        cells = pd.DataFrame({
+            'count': np.bincount(cell_ids, minlength=n_cells),
+            'score_sum': np.bincount(cell_ids, weights=scores, minlength=n_cells),
+            'score_sum_sq': np.bincount(cell_ids, weights=scores ** 2, minlength=n_cells),
+            'pass_count': np.bincount(cell_ids, weights=scores >= PASS_THRESHOLD, minlength=n_cells),
+            'top_count': np.bincount(cell_ids, weights=scores >= TOP_PERFORMER_THRESHOLD, minlength=n_cells)
+        })
+        if grouped is not None:
+            keys = grouped.size().index.to_frame(index=False)
+            cells = pd.concat([keys, cells], axis=1)
+            cells['score_min'] = grouped[score_column].min().to_numpy()
+            cells['score_max'] = grouped[score_column].max().to_numpy()
+        else:
+            cells['score_min'] = [scores.min()] if len(scores) else []
+            cells['score_max'] = [scores.max()] if len(scores) else []
+
+        # Moments for the trendline of each numeric factor (rows missing the factor are skipped)
+        for factor in trend_factors:
+            x = data[factor].to_numpy(dtype=float)
+            valid = ~np.isnan(x)
+            ids, xv, yv = cell_ids[valid], x[valid], scores[valid]
+            cells[f'{factor}_count'] = np.bincount(ids, minlength=n_cells)
+            cells[f'{factor}_sum'] = np.bincount(ids, weights=xv, minlength=n_cells)
+            cells[f'{factor}_sum_sq'] = np.bincount(ids, weights=xv ** 2, minlength=n_cells)
+            cells[f'{factor}_sum_xy'] = np.bincount(ids, weights=xv * yv, minlength=n_cells)
+            cells[f'{factor}_score_sum'] = np.bincount(ids, weights=yv, minlength=n_cells)
+            cells[f'{factor}_score_sum_sq'] = np.bincount(ids, weights=yv ** 2, minlength=n_cells)
+            x_range = pd.DataFrame({'cell': ids, 'x': xv}).groupby('cell')['x'].agg(['min', 'max'])
+            cells[f'{factor}_min'] = x_range['min'].reindex(range(n_cells)).to_numpy()
+            cells[f'{factor}_max'] = x_range['max'].reindex(range(n_cells)).to_numpy()
+
+        bin_edges = np.arange(SCORE_RANGE[0], SCORE_RANGE[1] + SCORE_BIN_WIDTH, SCORE_BIN_WIDTH, dtype=float)
+        n_bins = len(bin_edges) - 1
+        bins = np.clip(((scores - SCORE_RANGE[0]) // SCORE_BIN_WIDTH).astype(int), 0, n_bins - 1)
+        histograms = np.bincount(cell_ids * n_bins + bins, minlength=n_cells * n_bins)
+        histograms = histograms.reshape(n_cells, n_bins).astype(np.int32)
+
+        return cls(cells, histograms, bin_edges, dimensions,
+                   version or data_version(data), trend_factors)
+
+    def _mask(self, filters):
+        """Boolean mask over cells for filters of the form dimension=value(s)"""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, value in filters.items():
+            if value is None:
+                continue
+            if dim not in self.dimensions:
+                raise KeyError(f"{dim} is not a cube dimension")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.cells[dim].isin([str(v) for v in values]).to_numpy()
+        return mask
+
+    @staticmethod
+    def _stats(count, total, total_sq, passed, top):
+        if count == 0:
+            return {'count': 0, 'mean': np.nan, 'std': np.nan, 'pass_rate': np.nan, 'top_rate': np.nan}
+        variance = (total_sq - total ** 2 / count) / (count - 1) if count > 1 else 0.0
+        return {
+            'count': int(count),
+            'mean': total / count,
+            'std': float(np.sqrt(max(variance, 0.0))),
+            'pass_rate': passed / count * 100,
+            'top_rate': top / count * 100
+        }
+
+    def summary(self, **filters):
+        """Count, mean, std, pass rate and top-performer rate for a slice"""
+        selected = self.cells[self._mask(filters)]
+        return self._stats(selected['count'].sum(), selected['score_sum'].sum(),
+                           selected['score_sum_sq'].sum(), selected['pass_count'].sum(),
+                           selected['top_count'].sum())
+
+    def breakdown(self, dimension, **filters):
+        """Per-category summary statistics for one dimension within a slice"""
+        selected = self.cells[self._mask(filters)]
+        sums = selected.groupby(dimension)[['count', 'score_sum', 'score_sum_sq', 'pass_count', 'top_count']].sum()
+        rows = {category: self._stats(*row) for category, row in zip(sums.index, sums.to_numpy())}
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def histogram(self, bin_width=None, **filters):
+        """Score counts and bin edges for a slice, optionally re-binned to a coarser width"""
+        counts = self.histograms[self._mask(filters)].sum(axis=0)
+        edges = self.bin_edges
+        if bin_width and bin_width > SCORE_BIN_WIDTH:
+            step = int(round(bin_width / SCORE_BIN_WIDTH))
+            pad = (-len(counts)) % step
+            counts = np.concatenate([counts, np.zeros(pad, dtype=counts.dtype)]).reshape(-1, step).sum(axis=1)
+            edges = edges[0] + np.arange(len(counts) + 1) * step * SCORE_BIN_WIDTH
+        return counts, edges
+
+    def quantiles(self, qs, **filters):
+        """Approximate score quantiles for a slice by interpolating its histogram"""
+        counts, edges = self.histogram(**filters)
+        total = counts.sum()
+        if total == 0:
+            return np.full(len(qs), np.nan)
+        cumulative = np.concatenate([[0], np.cumsum(counts)]) / total
+        return np.interp(qs, cumulative, edges)
+
+    def box_stats(self, dimension, **filters):
+        """Quartiles, mean and Tukey whiskers per category, for precomputed box plots"""
+        mask = self._mask(filters)
+        rows = {}
+        for category in sorted(self.cells.loc[mask, dimension].unique()):
+            counts = self.histograms[mask & (self.cells[dimension] == category).to_numpy()].sum(axis=0)
+            total = counts.sum()
+            cumulative = np.concatenate([[0], np.cumsum(counts)]) / total
+            q1, median, q3 = np.interp([0.25, 0.5, 0.75], cumulative, self.bin_edges)
+            iqr = q3 - q1
+
+            # Whiskers end at the most extreme occupied bins within 1.5 IQR
+            occupied = self.bin_edges[:-1][counts > 0]
+            inside = occupied[(occupied >= q1 - 1.5 * iqr) & (occupied <= q3 + 1.5 * iqr)]
+            stats = self.summary(**dict(filters, **{dimension: category}))
+            rows[category] = {
+                'q1': q1, 'median': median, 'q3': q3, 'mean': stats['mean'],
+                'lowerfence': inside.min() if len(inside) else q1,
+                'upperfence': inside.max() if len(inside) else q3,
+                'count': int(total)
+            }
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def trendline(self, factor, **filters):
+        """Least-squares line of score on a numeric factor, from the cell moments
+
+        Returns slope, intercept, r_squared, n and the factor's min/max,
+        or None when the slice has too few distinct values to fit.
+        """
+        if factor not in self.trend_factors:
+            raise KeyError(f"{factor} is not a trend factor of the cube")
+        selected = self.cells[self._mask(filters)]
+        n = selected[f'{factor}_count'].sum()
+        sx = selected[f'{factor}_sum'].sum()
+        sxx = selected[f'{factor}_sum_sq'].sum()
+        sxy = selected[f'{factor}_sum_xy'].sum()
+        sy = selected[f'{factor}_score_sum'].sum()
+        syy = selected[f'{factor}_score_sum_sq'].sum()
+
+        x_var = n * sxx - sx ** 2
+        if n < 2 or x_var <= 0:
+            return None
+        slope = (n * sxy - sx * sy) / x_var
+        intercept = (sy - slope * sx) / n
+        y_var = n * syy - sy ** 2
+        r_squared = (n * sxy - sx * sy) ** 2 / (x_var * y_var) if y_var > 0 else 0.0
+        return {
+            'slope': slope, 'intercept': intercept, 'r_squared': r_squared, 'n': int(n),
+            'x_min': selected[f'{factor}_min'].min(), 'x_max': selected[f'{factor}_max'].max()
+        }
+
+    def save(self, path):
+        atomic_write_bytes(path, pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def load_or_build_cube(data, dimensions=None, cache_dir=AGGREGATE_CACHE_DIR):
+    """Return the cube for this data version, building and storing it on first use"""
+    version = data_version(data)
+    dims_key = fingerprint(dimensions or CUBE_DIMENSIONS, TREND_FACTORS, CUBE_FORMAT, cube_code_version())[:8]
+    path = os.path.join(cache_dir, f"cube_{version}_{dims_key}.pkl")
+    if os.path.exists(path):
+        try:
+            return AggregateCube.load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable aggregate cube {path}: {e}")
+
+    cube = AggregateCube.build(data, dimensions, version=version)
+    try:
+        cube.save(path)
+        logger.info(f"Aggregate cube with {len(cube.cells)} cells stored at {path}")
+    except OSError as e:
+        logger.warning(f"Could not store aggregate cube: {e}")
+    return cube
+
+def regression_diagnostics(data, factor, score_column='JAMB_Score'):
+    """Full OLS diagnostics for one factor; statsmodels is only imported here"""
+    import statsmodels.api as sm
+    frame = data[[factor, score_column]].dropna()
+    model = sm.OLS(frame[score_column], sm.add_constant(frame[factor])).fit()
+    return model.summary().as_text()
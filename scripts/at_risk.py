@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:05:33 2026
+
+@author: kings
+"""
+
+# scripts/at_risk.py
+import os
+import sys
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR, MODEL_DIR, PROCESSED_DATA_DIR
+from scripts.cache_utils import fingerprint, atomic_write_bytes
+from scripts.aggregates import data_version
+
+logger = logging.getLogger(__name__)
+
+AT_RISK_CACHE_DIR = os.path.join(CACHE_DIR, "at_risk")
+
+# Students are scored in chunks of this many rows
+DEFAULT_BATCH_SIZE = 20000
+
+# Students with a predicted pass probability below this are at risk
+DEFAULT_RISK_THRESHOLD = 0.5
+
+def model_file_version(model_name):
+    """Identify a saved model by its file size and modification time"""
+    model_path = os.path.join(MODEL_DIR, f"{model_name}.pkl")
+    try:
+        stat = os.stat(model_path)
+        return fingerprint(model_name, stat.st_size, stat.st_mtime_ns)[:16]
+    except OSError:
+        return "missing"
+
+def fallback_pass_probability(data, score_column='JAMB_Score'):
+    """Scale the observed score to a pseudo-probability when no classifier is available"""
+    return ((data[score_column].to_numpy(dtype=float) - 150) / 100).clip(0, 1)
+
+def score_pass_probability(model, data, batch_size=DEFAULT_BATCH_SIZE, target_column='JAMB_Score'):
+    """Predict the pass probability of every student in vectorized batches"""
+    if model is None:
+        return fallback_pass_probability(data, target_column)
+
+    columns = getattr(model, 'feature_names_in_', None)
+    features = data[list(columns)] if columns is not None else data.drop(columns=[target_column], errors='ignore')
+
+    probability = np.empty(len(features), dtype=float)
+    for start in range(0, len(features), batch_size):
+        stop = min(start + batch_size, len(features))
+        probability[start:stop] = model.predict_proba(features.iloc[start:stop])[:, 1]
+    return probability
+
+def top_k_lowest(values, k):
+    """Positions of the k smallest values in ascending order, without a full sort"""
+    if k <= 0 or len(values) == 0:
+        return np.array([], dtype=int)
+    if len(values) > k:
+        candidates = np.argpartition(values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(values[candidates], kind='stable')]
+
+class AtRiskRanking:
+    """Pass probabilities and the top-K most at-risk students per segment"""
+
+    def __init__(self, probability, threshold, k, segment_by, segments, student_rows):
+        self.probability = probability
+        self.threshold = threshold
+        self.k = k
+        self.segment_by = segment_by
+        # segment key -> (at-risk count, row positions of the top K, most at risk first)
+        self.segments = segments
+        self.student_rows = student_rows
+
+    @property
+    def at_risk_count(self):
+        return int(sum(count for count, _ in self.segments.values()))
+
+    def top(self, segment=None, k=None):
+        """Top at-risk students for one segment, or across all segments
+
+        The overall list is merged from the per-segment lists, so it holds
+        at most the K used when ranking.
+        """
+        if segment is not None:
+            _, positions = self.segments.get(segment, (0, np.array([], dtype=int)))
+        else:
+            positions = np.concatenate([pos for _, pos in self.segments.values()] or [np.array([], dtype=int)])
+            positions = positions[top_k_lowest(self.probability[positions], k or self.k)]
+        return self.student_rows.loc[positions[:k or self.k]]
+
+    def to_frame(self):
+        """All ranked lists as one table with a segment column and rank"""
+        frames = []
+        for segment, (_, positions) in self.segments.items():
+            frame = self.student_rows.loc[positions].copy()
+            frame.insert(0, 'Risk_Rank', np.arange(1, len(positions) + 1))
+            frame.insert(0, 'Segment', " / ".join(map(str, segment)) if isinstance(segment, tuple) else segment)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+class AtRiskRanker:
+    """Score students with the pass classifier and select the most at risk per segment"""
+
+    def __init__(self, model, batch_size=DEFAULT_BATCH_SIZE, threshold=DEFAULT_RISK_THRESHOLD, k=10):
+        self.model = model
+        self.batch_size = batch_size
+        self.threshold = threshold
+        self.k = k
+
+    def rank(self, data, segment_by=None):
+        """Rank students; total cost is linear in the number of students"""
+        probability = score_pass_probability(self.model, data, self.batch_size)
+        at_risk = np.flatnonzero(probability < self.threshold)
+
+        if segment_by:
+            groups = data.iloc[at_risk].groupby(segment_by, sort=True, dropna=False).indices
+            groups = {key: at_risk[positions] for key, positions in groups.items()}
+        else:
+            groups = {'All': at_risk}
+
+        segments = {
+            key: (len(positions), positions[top_k_lowest(probability[positions], self.k)])
+            for key, positions in groups.items()
+        }
+
+        # Keep only the rows that appear in a ranked list
+        selected = np.unique(np.concatenate([pos for _, pos in segments.values()] or [np.array([], dtype=int)]))
+        student_rows = data.iloc[selected].assign(Pass_Probability=probability[selected])
+        student_rows.index = selected
+
+        return AtRiskRanking(probability, self.threshold, self.k, segment_by, segments, student_rows)
+
+def load_or_rank(data, model, model_version, segment_by=None, k=10,
+                 threshold=DEFAULT_RISK_THRESHOLD, cache_dir=AT_RISK_CACHE_DIR):
+    """Return the stored ranking for this data and model version, ranking on first use"""
+    key = fingerprint(data_version(data), model_version, segment_by or [], k, threshold)[:24]
+    path = os.path.join(cache_dir, f"at_risk_{key}.pkl")
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable at-risk ranking {path}: {e}")
+
+    ranking = AtRiskRanker(model, k=k, threshold=threshold).rank(data, segment_by)
+    try:
+        atomic_write_bytes(path, pickle.dumps(ranking, protocol=pickle.HIGHEST_PROTOCOL))
+        ranking.to_frame().to_csv(os.path.join(cache_dir, f"at_risk_{key}.csv"), index=False)
+        logger.info(f"At-risk ranking stored at {path}")
+    except OSError as e:
+        logger.warning(f"Could not store at-risk ranking: {e}")
+    return ranking
+
+def main():
+    """Rank at-risk students per school type and location"""
+    # Record execution start time
+    start_time = datetime.now()
+    logger.info(f"At-risk ranking started at: {start_time}")
+
+    data = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'jamb_enhanced.csv'))
+    model_path = os.path.join(MODEL_DIR, "jamb_pass_classifier.pkl")
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+
+    ranking = load_or_rank(data, model, model_file_version("jamb_pass_classifier"),
+                           segment_by=['School_Type', 'School_Location'])
+    logger.info(f"{ranking.at_risk_count} students at risk across {len(ranking.segments)} segments")
+
+    # Record execution end time
+    end_time = datetime.now()
+    execution_time = end_time - start_time
+    logger.info(f"At-risk ranking completed at: {end_time}")
+    logger.info(f"Total execution time: {execution_time}")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler('at_risk.log'), logging.StreamHandler()]
+    )
+    main()
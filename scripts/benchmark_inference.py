@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:58:23 2026
+
+@author: kings
+"""
+
+# scripts/benchmark_inference.py
+#
+# Single-prediction latency of the dashboard's prediction form, through the
+# full sklearn pipelines (one-row DataFrame, ColumnTransformer) and through
+# the compiled predictors. Also checks that both give identical results.
+import os
+import sys
+import time
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import MODEL_DIR, PROCESSED_DATA_DIR
+from dashboard.inference import FORM_FIELDS, compile_models, form_inputs, predict_one
+
+logger = logging.getLogger(__name__)
+
+def load_models(model_names=("jamb_xgb_regressor", "jamb_pass_classifier")):
+    models = {}
+    for model_name in model_names:
+        with open(os.path.join(MODEL_DIR, f"{model_name}.pkl"), 'rb') as f:
+            models[model_name] = pickle.load(f)
+    return models
+
+def time_calls(func, inputs, repeat):
+    """Latency in milliseconds of each call, cycling through the inputs"""
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        values = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        func(values)
+        latencies[i] = (time.perf_counter() - started) * 1000
+    return latencies
+
+def benchmark(models, inputs, repeat=1000, warmup=50):
+    """p50/p99 latency of the pipeline and compiled paths, plus result agreement"""
+    predictors = compile_models(models)
+    paths = {
+        'pipeline': lambda values: predict_one(models, {}, values),
+        'compiled': lambda values: predict_one(models, predictors, values)
+    }
+
+    results = {}
+    for name, func in paths.items():
+        time_calls(func, inputs, warmup)
+        latencies = time_calls(func, inputs, repeat)
+        results[name] = {'p50_ms': np.percentile(latencies, 50), 'p99_ms': np.percentile(latencies, 99)}
+
+    mismatches = sum(paths['pipeline'](values) != paths['compiled'](values) for values in inputs)
+    return results, mismatches
+
+def main():
+    """Benchmark single-row inference on students from the processed data"""
+    # Record execution start time
+    start_time = datetime.now()
+    logger.info(f"Inference benchmark started at: {start_time}")
+
+    models = load_models()
+    students = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, 'jamb_enhanced.csv'))
+    inputs = [form_inputs(*row) for row in students[list(FORM_FIELDS)].head(200).itertuples(index=False)]
+
+    results, mismatches = benchmark(models, inputs)
+    for name, stats in results.items():
+        logger.info(f"{name:>9}: p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+    logger.info(f"Speed-up at p50: {results['pipeline']['p50_ms'] / results['compiled']['p50_ms']:.1f}x")
+    if mismatches:
+        logger.error(f"{mismatches} of {len(inputs)} predictions differ between the two paths")
+    else:
+        logger.info(f"All {len(inputs)} predictions identical")
+
+    # Record execution end time
+    end_time = datetime.now()
+    execution_time = end_time - start_time
+    logger.info(f"Inference benchmark completed at: {end_time}")
+    logger.info(f"Total execution time: {execution_time}")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler('benchmark_inference.log'), logging.StreamHandler()]
+    )
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:40:12 2026
+
+@author: kings
+"""
+
+# scripts/build_prediction_table.py
+#
+# Precompute the dashboard's predictions for every combination of
+# prediction-form values (distance rounded to the nearest grid level).
+# The dashboard uses the table when started with PREDICTION_TABLE=1 and
+# the models have not changed since the table was built.
+import os
+import sys
+import pickle
+import logging
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import MODEL_DIR
+from dashboard.inference import PredictionTable
+from dashboard.loader import path_signature, MODEL_FILES
+
+logger = logging.getLogger(__name__)
+
+def main():
+    """Build and store the prediction table for the current models"""
+    # Record execution start time
+    start_time = datetime.now()
+    logger.info(f"Prediction table build started at: {start_time}")
+
+    models = {}
+    for model_name in ["jamb_xgb_regressor", "jamb_pass_classifier"]:
+        with open(os.path.join(MODEL_DIR, f"{model_name}.pkl"), 'rb') as f:
+            models[model_name] = pickle.load(f)
+
+    # Same version the dashboard reports for the model directory
+    model_version = path_signature(MODEL_DIR, MODEL_FILES)
+    table = PredictionTable.build(models, model_version)
+    path = table.save()
+    logger.info(f"{len(table.scores):,} predictions over grid {table.shape} stored at {path}")
+
+    # Record execution end time
+    end_time = datetime.now()
+    execution_time = end_time - start_time
+    logger.info(f"Prediction table build completed at: {end_time}")
+    logger.info(f"Total execution time: {execution_time}")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler('build_prediction_table.log'), logging.StreamHandler()]
+    )
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:40 2026
+
+@author: kings
+"""
+
+# scripts/cache_utils.py
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+def _update_hash(hasher, obj):
+    """Feed an object into the hasher in a stable, type-aware way"""
+    if isinstance(obj, pd.DataFrame):
+        hasher.update(json.dumps([str(c) for c in obj.columns]).encode())
+        hasher.update(json.dumps([str(t) for t in obj.dtypes]).encode())
+        hasher.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Series):
+        hasher.update(str(obj.name).encode())
+        hasher.update(str(obj.dtype).encode())
+        hasher.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        hasher.update(str(obj.dtype).encode())
+        hasher.update(str(obj.shape).encode())
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        hasher.update(f"dict:{len(obj)}".encode())
+        for key in sorted(obj, key=str):
+            _update_hash(hasher, str(key))
+            _update_hash(hasher, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(f"{type(obj).__name__}:{len(obj)}".encode())
+        for item in obj:
+            _update_hash(hasher, item)
+    elif isinstance(obj, bytes):
+        hasher.update(obj)
+    else:
+        hasher.update(json.dumps(obj, sort_keys=True, default=str).encode())
+
+def fingerprint(*parts):
+    """Return a hex digest identifying the content of the given objects"""
+    hasher = hashlib.sha256()
+    for part in parts:
+        _update_hash(hasher, part)
+    return hasher.hexdigest()
+
+def code_signature(func):
+    """Describe a function's code without memory addresses or hash-ordered sets"""
+    def describe(code):
+        consts = []
+        for const in code.co_consts:
+            if hasattr(const, 'co_code'):
+                consts.append(describe(const))
+            elif isinstance(const, frozenset):
+                consts.append(sorted(repr(item) for item in const))
+            else:
+                consts.append(repr(const))
+        # co_names holds the globals and attributes used, e.g. plt.bar vs plt.barh
+        return [code.co_code, consts, list(code.co_names)]
+    return describe(func.__code__)
+
+def atomic_write_bytes(path, payload):
+    """Write bytes so concurrent readers never observe a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -15,6 +15,7 @@ from datetime import datetime
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config import RAW_DATA_DIR, PROCESSED_DATA_DIR
+from scripts.profiling import profile_stage
 
 # Set up logging
 logging.basicConfig(
@@ -34,6 +35,7 @@ def load_csv(filename):
         logger.error(f"Error loading {filename}: {e}")
         return None
 
+@profile_stage("data_import")
 def main():
     """Main function to import and preprocess data"""
     # Record execution start time
@@ -20,6 +20,7 @@ from sklearn.pipeline import Pipeline
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config import PROCESSED_DATA_DIR
+from scripts.profiling import profile_stage
 
 # Set up logging
 logging.basicConfig(
@@ -96,6 +97,7 @@ def engineer_features(df):
     
     return df_new
 
+@profile_stage("data_processing")
 def main():
     """Main function for data preprocessing"""
     # Record execution start time
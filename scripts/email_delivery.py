@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:02:17 2026
+
+@author: kings
+"""
+
+# scripts/email_delivery.py
+#
+# Bulk delivery of report emails through a persistent spool directory.
+# Messages are written to spool/pending, claimed into spool/inflight by a
+# worker, and moved to spool/sent or spool/failed once delivered. A crash
+# therefore never drops a report, and a report that reached spool/sent is
+# never sent again. A claim is a lease: only messages whose lease expired
+# are taken back from spool/inflight, so overlapping runs do not resend
+# each other's messages.
+#
+# To try it locally, start a debugging SMTP server (pip install aiosmtpd):
+#   python -m aiosmtpd -n -l localhost:1025
+# and run:
+#   SMTP_PORT=1025 python scripts/email_delivery.py
+import os
+import sys
+import time
+import queue
+import random
+import hashlib
+import logging
+import smtplib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email import message_from_bytes, policy
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import SMTP_CONFIG, EMAIL_SPOOL_DIR
+from scripts.cache_utils import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+# SMTP reply codes that will not succeed on retry
+PERMANENT_SMTP_CODES = range(500, 600)
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP connections shared by delivery workers"""
+
+    def __init__(self, host, port, user=None, password=None, use_tls=False,
+                 size=4, timeout=30, max_messages_per_connection=100):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._sent_counts = {}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _open(self):
+        """Open and authenticate a new SMTP connection"""
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        conn.ehlo()
+        if self.use_tls:
+            conn.starttls()
+            conn.ehlo()
+        if self.user:
+            conn.login(self.user, self.password)
+        with self._lock:
+            self.connections_opened += 1
+            self._sent_counts[id(conn)] = 0
+        logger.info(f"Opened SMTP connection to {self.host}:{self.port}")
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._sent_counts.pop(id(conn), None)
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, returning it to the pool unless it failed"""
+        self._slots.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            yield conn
+        except Exception:
+            if conn is not None:
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self._sent_counts[id(conn)] = self._sent_counts.get(id(conn), 0) + 1
+                    exhausted = self._sent_counts[id(conn)] >= self.max_messages_per_connection
+                if exhausted:
+                    self._discard(conn)
+                else:
+                    self._idle.put(conn)
+            self._slots.release()
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+class MailSpool:
+    """Crash-safe on-disk queue of outgoing messages"""
+
+    STATES = ('pending', 'inflight', 'sent', 'failed')
+
+    def __init__(self, spool_dir=EMAIL_SPOOL_DIR, lease=SMTP_CONFIG['inflight_lease']):
+        self.spool_dir = spool_dir
+        self.lease = lease
+        for state in self.STATES:
+            os.makedirs(os.path.join(spool_dir, state), exist_ok=True)
+
+    def _path(self, state, name):
+        return os.path.join(self.spool_dir, state, name)
+
+    def _find(self, name):
+        for state in self.STATES:
+            if os.path.exists(self._path(state, name)):
+                return state
+        return None
+
+    def enqueue(self, message, key):
+        """Add a message to the spool; a key that was already spooled is ignored"""
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + ".eml"
+        state = self._find(name)
+        if state is not None:
+            logger.info(f"Message {key} already spooled ({state}), skipping")
+            return name
+        atomic_write_bytes(self._path('pending', name), message.as_bytes())
+        return name
+
+    def recover(self):
+        """Return messages whose in-flight lease expired (a crashed run) to the pending queue"""
+        recovered = 0
+        expired_before = time.time() - self.lease
+        for name in os.listdir(os.path.join(self.spool_dir, 'inflight')):
+            try:
+                if os.path.getmtime(self._path('inflight', name)) > expired_before:
+                    continue
+                os.replace(self._path('inflight', name), self._path('pending', name))
+            except FileNotFoundError:
+                # Completed by its worker meanwhile
+                continue
+            recovered += 1
+        if recovered:
+            logger.warning(f"Recovered {recovered} in-flight messages from an interrupted run")
+        return recovered
+
+    def pending(self):
+        """List pending message names, oldest first"""
+        names = [n for n in os.listdir(os.path.join(self.spool_dir, 'pending')) if n.endswith('.eml')]
+        return sorted(names, key=lambda n: os.path.getmtime(self._path('pending', n)))
+
+    def claim(self, name):
+        """Move a pending message in flight; returns False if another worker took it"""
+        try:
+            os.rename(self._path('pending', name), self._path('inflight', name))
+        except FileNotFoundError:
+            return False
+        self.renew(name)
+        return True
+
+    def renew(self, name):
+        """Restart the lease of an in-flight message (its mtime)"""
+        os.utime(self._path('inflight', name))
+
+    def read(self, name):
+        with open(self._path('inflight', name), 'rb') as f:
+            return message_from_bytes(f.read(), policy=policy.SMTP)
+
+    def complete(self, name):
+        os.replace(self._path('inflight', name), self._path('sent', name))
+
+    def fail(self, name, error):
+        os.replace(self._path('inflight', name), self._path('failed', name))
+        with open(self._path('failed', name + ".error"), 'w') as f:
+            f.write(f"{datetime.now().isoformat()} {error}\n")
+
+class BulkMailer:
+    """Send spooled messages concurrently over pooled SMTP connections"""
+
+    def __init__(self, spool, pool, max_workers=4, max_retries=3, backoff=1.0):
+        self.spool = spool
+        self.pool = pool
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def _deliver(self, name):
+        if not self.spool.claim(name):
+            return 'skipped'
+        message = self.spool.read(name)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.spool.renew(name)
+                with self.pool.connection() as conn:
+                    conn.send_message(message)
+                self.spool.complete(name)
+                return 'sent'
+            except smtplib.SMTPRecipientsRefused as e:
+                # Greylisting refuses recipients with 4xx codes; only 5xx refusals are final
+                codes = [code for code, _ in e.recipients.values()]
+                if codes and all(code in PERMANENT_SMTP_CODES for code in codes):
+                    logger.error(f"Permanent failure for {message['To']}: {e}")
+                    self.spool.fail(name, e)
+                    return 'failed'
+                error = e
+            except smtplib.SMTPResponseException as e:
+                # Includes SMTPSenderRefused
+                if e.smtp_code in PERMANENT_SMTP_CODES:
+                    logger.error(f"Permanent failure for {message['To']}: {e}")
+                    self.spool.fail(name, e)
+                    return 'failed'
+                error = e
+            except (smtplib.SMTPException, OSError) as e:
+                error = e
+
+            if attempt < self.max_retries:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Delivery to {message['To']} failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        logger.error(f"Giving up on {message['To']} after {self.max_retries + 1} attempts: {error}")
+        self.spool.fail(name, error)
+        return 'failed'
+
+    def send_pending(self):
+        """Deliver every pending message and return counts by outcome"""
+        self.spool.recover()
+        names = self.spool.pending()
+        results = {'sent': 0, 'failed': 0, 'skipped': 0}
+        if not names:
+            return results
+
+        logger.info(f"Delivering {len(names)} messages with {self.max_workers} workers")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for outcome in executor.map(self._deliver, names):
+                    results[outcome] += 1
+        finally:
+            self.pool.close_all()
+
+        logger.info(f"Delivery finished: {results}")
+        return results
+
+def create_mailer(spool_dir=EMAIL_SPOOL_DIR, smtp_config=None):
+    """Create a BulkMailer from the SMTP configuration"""
+    cfg = dict(SMTP_CONFIG, **(smtp_config or {}))
+    pool = SMTPConnectionPool(
+        cfg['host'], cfg['port'], cfg['user'], cfg['password'],
+        use_tls=cfg['use_tls'], size=cfg['max_workers']
+    )
+    return BulkMailer(MailSpool(spool_dir, lease=cfg['inflight_lease']), pool,
+                      max_workers=cfg['max_workers'], max_retries=cfg['max_retries'])
+
+def main():
+    """Deliver everything waiting in the spool"""
+    # Record execution start time
+    start_time = datetime.now()
+    logger.info(f"Email delivery started at: {start_time}")
+
+    create_mailer().send_pending()
+
+    # Record execution end time
+    end_time = datetime.now()
+    execution_time = end_time - start_time
+    logger.info(f"Email delivery completed at: {end_time}")
+    logger.info(f"Total execution time: {execution_time}")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler('email_delivery.log'), logging.StreamHandler()]
+    )
+    main()
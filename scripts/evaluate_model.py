@@ -25,6 +25,8 @@ import shap
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config import PROCESSED_DATA_DIR, MODEL_DIR
+from scripts.profiling import profile_stage
+from scripts.plot_cache import save_cached_plot
 
 # Set up logging
 logging.basicConfig(
@@ -86,17 +88,18 @@ def evaluate_regression_model(model, X, y, model_name="Regression Model"):
     logger.info(f"  R²: {r2:.4f}")
     
     # Create scatter plot of actual vs predicted
-    plt.figure(figsize=(10, 6))
-    plt.scatter(y, y_pred, alpha=0.5)
-    plt.plot([y.min(), y.max()], [y.min(), y.max()], 'r--')
-    plt.xlabel('Actual JAMB Score')
-    plt.ylabel('Predicted JAMB Score')
-    plt.title(f'{model_name}: Actual vs Predicted JAMB Scores')
-    
-    # Save plot
+    def draw_scatter(plot_data):
+        actual, predicted = plot_data
+        plt.figure(figsize=(10, 6))
+        plt.scatter(actual, predicted, alpha=0.5)
+        plt.plot([actual.min(), actual.max()], [actual.min(), actual.max()], 'r--')
+        plt.xlabel('Actual JAMB Score')
+        plt.ylabel('Predicted JAMB Score')
+        plt.title(f'{model_name}: Actual vs Predicted JAMB Scores')
+    
+    # Save plot (reused from the plot cache when the predictions are unchanged)
     plot_path = os.path.join(MODEL_DIR, f"{model_name.replace(' ', '_').lower()}_scatter_plot.png")
-    plt.savefig(plot_path)
-    plt.close()
+    save_cached_plot(plot_path, f"{model_name} scatter", (np.asarray(y), np.asarray(y_pred)), draw_scatter)
     logger.info(f"Scatter plot saved to {plot_path}")
     
     # Return metrics as dictionary
@@ -123,35 +126,36 @@ def evaluate_classification_model(model, X, y, model_name="Classification Model"
     logger.info(f"Classification report:\n{report}")
     
     # Create confusion matrix plot
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                xticklabels=['Fail', 'Pass'], yticklabels=['Fail', 'Pass'])
-    plt.xlabel('Predicted')
-    plt.ylabel('Actual')
-    plt.title(f'{model_name}: Confusion Matrix')
+    def draw_confusion_matrix(matrix):
+        plt.figure(figsize=(8, 6))
+        sns.heatmap(matrix, annot=True, fmt='d', cmap='Blues', 
+                    xticklabels=['Fail', 'Pass'], yticklabels=['Fail', 'Pass'])
+        plt.xlabel('Predicted')
+        plt.ylabel('Actual')
+        plt.title(f'{model_name}: Confusion Matrix')
     
     # Save confusion matrix plot
     cm_path = os.path.join(MODEL_DIR, f"{model_name.replace(' ', '_').lower()}_confusion_matrix.png")
-    plt.savefig(cm_path)
-    plt.close()
+    save_cached_plot(cm_path, f"{model_name} confusion matrix", cm, draw_confusion_matrix)
     logger.info(f"Confusion matrix saved to {cm_path}")
     
     # Create ROC curve
     fpr, tpr, _ = roc_curve(y, y_prob)
     roc_auc = auc(fpr, tpr)
     
-    plt.figure(figsize=(8, 6))
-    plt.plot(fpr, tpr, label=f'AUC = {roc_auc:.4f}')
-    plt.plot([0, 1], [0, 1], 'k--')
-    plt.xlabel('False Positive Rate')
-    plt.ylabel('True Positive Rate')
-    plt.title(f'{model_name}: ROC Curve')
-    plt.legend(loc='lower right')
+    def draw_roc_curve(curve):
+        curve_fpr, curve_tpr = curve
+        plt.figure(figsize=(8, 6))
+        plt.plot(curve_fpr, curve_tpr, label=f'AUC = {roc_auc:.4f}')
+        plt.plot([0, 1], [0, 1], 'k--')
+        plt.xlabel('False Positive Rate')
+        plt.ylabel('True Positive Rate')
+        plt.title(f'{model_name}: ROC Curve')
+        plt.legend(loc='lower right')
     
     # Save ROC curve plot
     roc_path = os.path.join(MODEL_DIR, f"{model_name.replace(' ', '_').lower()}_roc_curve.png")
-    plt.savefig(roc_path)
-    plt.close()
+    save_cached_plot(roc_path, f"{model_name} roc curve", (fpr, tpr), draw_roc_curve)
     logger.info(f"ROC curve saved to {roc_path}")
     
     # Return metrics as dictionary
@@ -205,6 +209,7 @@ def generate_shap_analysis(model, X, model_name="Model"):
         logger.error(f"Error generating SHAP analysis: {e}")
         return False
 
+@profile_stage("evaluate_model")
 def main():
     """Main function for model evaluation"""
     # Record execution start time
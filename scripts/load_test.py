@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:59:41 2026
+
+@author: kings
+"""
+
+# scripts/load_test.py
+#
+# Replays a realistic mix of Dash callback requests (_dash-update-component)
+# against a dashboard instance with a number of concurrent simulated viewers,
+# then reports throughput and per-callback latency percentiles.
+#
+# Settings come from the environment:
+#   LOAD_TEST_URL          dashboard to test; unset starts dashboard/app.py locally
+#   LOAD_TEST_PORT         port for the locally started dashboard (default 8765)
+#   LOAD_TEST_CONCURRENCY  simultaneous viewers (default 10)
+#   LOAD_TEST_DURATION     seconds of measured load (default 30)
+#   LOAD_TEST_WARMUP       seconds of unmeasured load before that (default 5)
+#   LOAD_TEST_OUTPUT       optional path for the results as JSON
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from dashboard.inference import FORM_GRID
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_PATH = "/_dash-update-component"
+
+# Prediction form inputs, in FORM_GRID order
+FORM_IDS = ["study-hours-input", "teacher-quality-input", "attendance-input", "distance-input",
+            "school-type-input", "location-input", "tutorials-input", "materials-input",
+            "parent-input", "it-input"]
+
+FACTORS = ['Study_Hours_Per_Week', 'Teacher_Quality', 'Distance_To_School', 'School_Type',
+           'Parent_Involvement', 'Access_To_Learning_Materials']
+
+SUBJECTS = {
+    "English Language": ["Comprehension", "Lexis and Structure", "Oral English", "Literature"],
+    "Mathematics": ["Algebra", "Geometry", "Statistics", "Calculus", "Trigonometry"],
+    "Physics": ["Mechanics", "Energy", "Waves", "Electricity", "Modern Physics"],
+    "Biology": ["Cell Biology", "Genetics", "Ecology", "Physiology", "Evolution"]
+}
+RESOURCE_TYPES = ["all", "book", "video", "practice", "course"]
+
+def callback_body(outputs, inputs, state=()):
+    """Request body the Dash renderer sends for a callback with the given outputs"""
+    outputs = [outputs] if isinstance(outputs, str) else outputs
+    return {
+        "output": outputs[0] if len(outputs) == 1 else ".." + "...".join(outputs) + "..",
+        "outputs": [{"id": o.split(".")[0], "property": o.split(".")[1]} for o in outputs]
+                   if len(outputs) > 1 else {"id": outputs[0].split(".")[0], "property": outputs[0].split(".")[1]},
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": [f"{i}.{p}" for i, p, _ in inputs]
+    }
+
+# Each scenario is one user action and returns the callback requests it triggers
+def interval_tick(rng, viewer):
+    viewer["ticks"] += 1
+    return [callback_body("data-version-store.data",
+                          [("version-interval", "n_intervals", viewer["ticks"])],
+                          [("data-version-store", "data", viewer.get("data_version"))])]
+
+def clock_sync(rng, viewer):
+    viewer["ticks"] += 1
+    return [callback_body("server-time-store.data", [("clock-sync-interval", "n_intervals", viewer["ticks"])])]
+
+def factor_change(rng, viewer):
+    factor = rng.choice(FACTORS)
+    return [
+        callback_body("factor-insights.children", [("factor-dropdown", "value", factor)]),
+        callback_body("factor-analysis.figure", [("factor-dropdown", "value", factor),
+                                                 ("cross-filter-store", "data", {})]),
+        callback_body("factor-diagnostics.children", [("factor-diagnostics-toggle", "value", []),
+                                                      ("factor-dropdown", "value", factor),
+                                                      ("cross-filter-store", "data", {})])
+    ]
+
+def prediction(rng, viewer):
+    viewer["clicks"] += 1
+    values = [rng.choice(list(grid)) for grid in FORM_GRID.values()]
+    values = [v.item() if hasattr(v, "item") else v for v in values]
+    state = [(form_id, "value", value) for form_id, value in zip(FORM_IDS, values)]
+    click = [("predict-button", "n_clicks", viewer["clicks"])]
+    return [callback_body("prediction-output.children", click, state),
+            callback_body(["sensitivity-curves.figure", "sensitivity-curves.style"], click, state)]
+
+def subject_change(rng, viewer):
+    subject = rng.choice(list(SUBJECTS))
+    viewer["subject"] = subject
+    return [
+        callback_body("topic-dropdown.options", [("subject-dropdown", "value", subject)]),
+        callback_body("resources-container.children", [("subject-dropdown", "value", subject),
+                                                       ("topic-dropdown", "value", None),
+                                                       ("resource-type-dropdown", "value", "all")])
+    ]
+
+def topic_change(rng, viewer):
+    subject = viewer.get("subject") or rng.choice(list(SUBJECTS))
+    return [callback_body("resources-container.children",
+                          [("subject-dropdown", "value", subject),
+                           ("topic-dropdown", "value", rng.choice(SUBJECTS[subject])),
+                           ("resource-type-dropdown", "value", rng.choice(RESOURCE_TYPES))])]
+
+# Relative frequency of each action; interval ticks dominate an idle-heavy audience
+SCENARIOS = [
+    (interval_tick, 40),
+    (clock_sync, 5),
+    (factor_change, 20),
+    (prediction, 15),
+    (subject_change, 10),
+    (topic_change, 10)
+]
+
+def send(url, body, timeout=60):
+    """POST one callback request; returns (status, seconds, response bytes, response headers)"""
+    request = urllib.request.Request(url + CALLBACK_PATH, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+            return response.status, time.perf_counter() - started, len(payload), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, time.perf_counter() - started, len(e.read()), e.headers
+    except (urllib.error.URLError, OSError):
+        return 0, time.perf_counter() - started, 0, {}
+
+def viewer_loop(url, deadline, measure_from, seed, results, lock):
+    """One simulated viewer issuing actions back to back until the deadline"""
+    rng = random.Random(seed)
+    viewer = {"ticks": 0, "clicks": 0}
+    actions, weights = zip(*SCENARIOS)
+    while time.time() < deadline:
+        for body in rng.choices(actions, weights)[0](rng, viewer):
+            status, seconds, size, headers = send(url, body)
+            viewer["data_version"] = headers.get("X-Data-Version", viewer.get("data_version"))
+            if time.time() >= measure_from:
+                with lock:
+                    results.append((body["output"], status, seconds, size))
+
+def run_load(url, concurrency=10, duration=30, warmup=5, seed=42):
+    """Run the traffic mix and return the measured (callback, status, seconds, bytes) samples"""
+    results, lock = [], threading.Lock()
+    measure_from = time.time() + warmup
+    deadline = measure_from + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for viewer in range(concurrency):
+            pool.submit(viewer_loop, url, deadline, measure_from, seed + viewer, results, lock)
+    return results
+
+def summarize(results, duration):
+    """Throughput and latency percentiles per callback"""
+    per_callback = {}
+    for callback, status, seconds, size in results:
+        per_callback.setdefault(callback, []).append((status, seconds, size))
+
+    callbacks = {}
+    for callback, samples in sorted(per_callback.items()):
+        statuses = np.array([s[0] for s in samples])
+        latencies = np.array([s[1] for s in samples]) * 1000
+        callbacks[callback] = {
+            "requests": len(samples),
+            "errors": int(((statuses >= 400) | (statuses == 0)).sum()),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "mean_bytes": float(np.mean([s[2] for s in samples]))
+        }
+    latencies = np.array([r[2] for r in results]) * 1000 if results else np.zeros(1)
+    return {
+        "requests": len(results),
+        "throughput_rps": len(results) / duration,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "callbacks": callbacks
+    }
+
+def start_dashboard(port, timeout=120):
+    """Start dashboard/app.py on port and wait until its resources are loaded"""
+    app_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dashboard", "app.py")
+    process = subprocess.Popen([sys.executable, app_path], env=dict(os.environ, PORT=str(port)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Dashboard exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/health/startup", timeout=5) as response:
+                if all(json.load(response)["ready"].values()):
+                    return process, url
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise RuntimeError(f"Dashboard did not become ready within {timeout} seconds")
+
+def main():
+    """Load-test a dashboard instance with the configured number of viewers"""
+    # Record execution start time
+    start_time = datetime.now()
+    logger.info(f"Load test started at: {start_time}")
+
+    concurrency = int(os.getenv("LOAD_TEST_CONCURRENCY", 10))
+    duration = float(os.getenv("LOAD_TEST_DURATION", 30))
+    warmup = float(os.getenv("LOAD_TEST_WARMUP", 5))
+    url = os.getenv("LOAD_TEST_URL", "").rstrip("/")
+
+    process = None
+    if not url:
+        process, url = start_dashboard(int(os.getenv("LOAD_TEST_PORT", 8765)))
+        logger.info(f"Started dashboard at {url}")
+    try:
+        logger.info(f"Replaying callback traffic from {concurrency} viewers for {duration:.0f}s against {url}")
+        summary = summarize(run_load(url, concurrency, duration, warmup), duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    logger.info(f"{summary['requests']} requests, {summary['throughput_rps']:.1f} req/s, "
+                f"p50 {summary['p50_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms")
+    for callback, stats in summary["callbacks"].items():
+        logger.info(f"{callback[:60]:<60} n={stats['requests']:<6} errors={stats['errors']:<4} "
+                    f"p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms  "
+                    f"p99 {stats['p99_ms']:7.1f} ms  {stats['mean_bytes'] / 1024:7.1f} KiB")
+
+    output = os.getenv("LOAD_TEST_OUTPUT")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(dict(summary, concurrency=concurrency, duration=duration, url=url), f, indent=2)
+        logger.info(f"Results saved to {output}")
+
+    # Record execution end time
+    end_time = datetime.now()
+    execution_time = end_time - start_time
+    logger.info(f"Load test completed at: {end_time}")
+    logger.info(f"Total execution time: {execution_time}")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler('load_test.log'), logging.StreamHandler()]
+    )
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:20:05 2026
+
+@author: kings
+"""
+
+# scripts/plot_cache.py
+import os
+import sys
+import io
+import logging
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import PLOT_CACHE_DIR
+from scripts.cache_utils import fingerprint, atomic_write_bytes, code_signature
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ('png', 'svg')
+
+# Images kept before the least recently used are removed
+PLOT_CACHE_MAX_ENTRIES = int(os.getenv("PLOT_CACHE_MAX_ENTRIES", 256))
+
+class PlotCache:
+    """Content-addressed store of rendered matplotlib figures
+
+    Entries are keyed by the plot kind, a hash of the plotted data, the
+    style (matplotlib rc parameters) and the bytecode of the drawing
+    function, so editing a plot function invalidates its old images.
+    Images of superseded data or code are never asked for again, so the
+    least recently used are evicted beyond max_entries.
+    """
+
+    def __init__(self, cache_dir=PLOT_CACHE_DIR, enabled=True, max_entries=PLOT_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, kind, data, draw, style=None, fmt='png', dpi=100):
+        """Build the cache key for a plot"""
+        return fingerprint(kind, data, style or {}, fmt, dpi,
+                           draw.__qualname__, code_signature(draw))
+
+    def _path(self, key, fmt):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{fmt}")
+
+    def get(self, key, fmt='png'):
+        """Return stored image bytes or None"""
+        path = self._path(key, fmt)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            return None
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def put(self, key, payload, fmt='png'):
+        """Store image bytes under the given key"""
+        atomic_write_bytes(self._path(key, fmt), payload)
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(SUPPORTED_FORMATS):
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def render(self, kind, data, draw, style=None, fmt='png', dpi=100):
+        """Return image bytes for draw(data), rendering only on a cache miss
+
+        draw receives the data and must draw on a new matplotlib figure;
+        the current figure is saved and closed afterwards.
+        """
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported plot format: {fmt}")
+
+        key = self.make_key(kind, data, draw, style, fmt, dpi)
+        if self.enabled:
+            payload = self.get(key, fmt)
+            if payload is not None:
+                self.hits += 1
+                logger.info(f"Plot cache hit for {kind} ({key[:12]})")
+                return payload
+
+        self.misses += 1
+        with plt.rc_context(rc=style or {}):
+            draw(data)
+            fig = plt.gcf()
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=dpi)
+            plt.close(fig)
+        payload = buffer.getvalue()
+
+        if self.enabled:
+            self.put(key, payload, fmt)
+            logger.info(f"Plot cache miss for {kind}, stored {key[:12]}")
+        return payload
+
+# Shared cache used by the reporting and evaluation scripts
+plot_cache = PlotCache(enabled=os.getenv("PLOT_CACHE_DISABLED", "0") != "1")
+
+def render_cached_plot(kind, data, draw, style=None, fmt='png', dpi=100):
+    """Render a plot through the shared cache"""
+    return plot_cache.render(kind, data, draw, style=style, fmt=fmt, dpi=dpi)
+
+def save_cached_plot(path, kind, data, draw, style=None, dpi=100):
+    """Render a plot through the shared cache and write it to path"""
+    fmt = os.path.splitext(path)[1].lstrip('.').lower() or 'png'
+    payload = render_cached_plot(kind, data, draw, style=style, fmt=fmt, dpi=dpi)
+    # Leave an identical file untouched so watchers of the directory see no change
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == payload:
+                return path
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return path
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:58:14 2026
+
+@author: kings
+"""
+
+# scripts/profiling.py
+#
+# Opt-in cProfile hooks for pipeline stages and dashboard requests.
+# Set PROFILE=1 to enable. Pipeline stages are profiled on every run;
+# dashboard requests are sampled at PROFILE_SAMPLE_RATE. Each profile is
+# written to PROFILE_DIR as a .prof file (open with snakeviz, or turn into
+# a flamegraph with flameprof) next to a .json file describing the run.
+# When PROFILE is not set nothing is wrapped or registered.
+import os
+import sys
+import json
+import time
+import random
+import socket
+import cProfile
+import logging
+import functools
+import threading
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config import CACHE_DIR
+
+PROFILE_ENABLED = os.environ.get("PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+
+# Fraction of dashboard requests profiled when enabled
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.01))
+
+logger = logging.getLogger(__name__)
+
+# cProfile can only trace one request at a time per process; others are skipped
+_request_lock = threading.Lock()
+
+def save_profile(profiler, name, metadata):
+    """Write the profile and its metadata; returns the .prof path"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)[:80]
+    base = os.path.join(PROFILE_DIR, f"{stamp}_{os.getpid()}_{safe_name}")
+    profiler.dump_stats(base + ".prof")
+    metadata = dict(metadata, name=name, pid=os.getpid(), host=socket.gethostname(),
+                    saved_at=datetime.now().isoformat(), profile=os.path.basename(base + ".prof"))
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    return base + ".prof"
+
+def profile_stage(name):
+    """Decorator profiling a pipeline stage (a script's main) when PROFILE=1"""
+    def decorator(func):
+        if not PROFILE_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                path = save_profile(profiler, name, {
+                    "kind": "stage",
+                    "argv": sys.argv,
+                    "duration_seconds": time.perf_counter() - started
+                })
+                logger.info(f"Profile of {name} saved to {path}")
+        return wrapper
+    return decorator
+
+def init_request_profiling(server, sample_rate=PROFILE_SAMPLE_RATE):
+    """Profile a sample of the Flask server's requests when PROFILE=1"""
+    if not PROFILE_ENABLED or sample_rate <= 0:
+        return
+    import flask
+
+    @server.before_request
+    def start_request_profile():
+        if random.random() >= sample_rate or not _request_lock.acquire(blocking=False):
+            return
+        flask.g.profiler = cProfile.Profile()
+        flask.g.profile_started = time.perf_counter()
+        flask.g.profiler.enable()
+
+    @server.after_request
+    def record_request_status(response):
+        if "profiler" in flask.g:
+            flask.g.profile_status = response.status_code
+        return response
+
+    @server.teardown_request
+    def stop_request_profile(error=None):
+        profiler = flask.g.pop("profiler", None)
+        if profiler is None:
+            return
+        profiler.disable()
+        _request_lock.release()
+        request = flask.request
+        body = request.get_json(silent=True) if request.is_json else None
+        callback = body.get("output") if isinstance(body, dict) else None
+        try:
+            save_profile(profiler, callback or request.path, {
+                "kind": "request",
+                "method": request.method,
+                "path": request.path,
+                "query": request.query_string.decode("utf-8", "replace"),
+                "callback": callback,
+                "status": flask.g.get("profile_status"),
+                "error": repr(error) if error else None,
+                "sample_rate": sample_rate,
+                "duration_seconds": time.perf_counter() - flask.g.profile_started
+            })
+        except OSError as e:
+            print(f"Error saving request profile: {e}")
+
+    print(f"Profiling {sample_rate:.1%} of requests into {PROFILE_DIR}")
@@ -8,6 +8,8 @@ Created on Fri May  9 06:37:18 2025
 # scripts/report_generator.py
 import os
 import sys
+import pickle
+from html import escape
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -18,11 +20,19 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
+from email.mime.image import MIMEImage
+from email.utils import formatdate, make_msgid
 from jinja2 import Template
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from config import PROCESSED_DATA_DIR
+from config import PROCESSED_DATA_DIR, MODEL_DIR, SMTP_CONFIG, CACHE_DIR
+from scripts.cache_utils import fingerprint, atomic_write_bytes, code_signature
+from scripts.plot_cache import render_cached_plot
+from scripts.aggregates import load_or_build_cube, cube_code_version, AggregateCube, PASS_THRESHOLD
+from scripts.at_risk import load_or_rank, model_file_version, DEFAULT_RISK_THRESHOLD
+from scripts.email_delivery import MailSpool, create_mailer
+from scripts.profiling import profile_stage
 
 # Set up logging
 logging.basicConfig(
@@ -36,6 +46,36 @@ logger = logging.getLogger(__name__)
 REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "reports")
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+# Rendered report sections, keyed by a hash of each section's inputs
+REPORT_SECTIONS_DIR = os.path.join(CACHE_DIR, "report_sections")
+
+# Width in points of the score distribution bars
+DISTRIBUTION_BIN_WIDTH = 10
+
+# Categorical factors shown in the factor analysis figure
+KEY_FACTORS = [
+    'School_Type', 'School_Location', 'Extra_Tutorials',
+    'Access_To_Learning_Materials', 'Parent_Involvement', 'Socioeconomic_Status'
+]
+
+# Number of students listed in the at-risk table
+AT_RISK_TOP_N = 10
+
+# Columns shown in the at-risk students table
+AT_RISK_COLUMNS = [
+    'Student_ID', 'School_Type', 'School_Location', 'Study_Hours_Per_Week',
+    'Attendance_Rate', 'JAMB_Score', 'Pass_Probability'
+]
+
+# Matplotlib style shared by all report figures (part of the plot cache key)
+REPORT_STYLE = {
+    'font.family': 'sans-serif',
+    'axes.titlesize': 14,
+    'axes.titlecolor': '#1C4E80',
+    'axes.spines.top': False,
+    'axes.spines.right': False
+}
+
 # HTML template for report
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -164,4 +204,355 @@ def load_processed_data():
         return pd.read_csv(filepath)
     except Exception as e:
         logger.error(f"Error loading data: {e}")
-        
\ No newline at end of file
+        return None
+
+def load_model(model_name):
+    """Load model from disk"""
+    model_path = os.path.join(MODEL_DIR, f"{model_name}.pkl")
+    try:
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        logger.info(f"Model loaded from {model_path}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading model: {e}")
+        return None
+
+def draw_score_distribution(plot_data):
+    """Draw the histogram of JAMB scores from pre-binned counts and the pass threshold"""
+    (counts, edges), pass_threshold = plot_data
+    occupied = np.nonzero(counts)[0]
+    plt.figure(figsize=(10, 6))
+    plt.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+            color='#2563eb', edgecolor='white')
+    if len(occupied):
+        plt.xlim(edges[occupied[0]], edges[occupied[-1] + 1])
+    plt.axvline(pass_threshold, color='red', linestyle='--', label='Pass Threshold')
+    plt.xlabel('JAMB Score')
+    plt.ylabel('Number of Students')
+    plt.title('JAMB Score Distribution')
+    plt.legend(loc='upper right')
+
+def draw_factor_analysis(plot_data):
+    """Draw average JAMB score by category for each key factor against the pass threshold"""
+    factor_means, pass_threshold = plot_data
+    factors = list(factor_means)
+    n_cols = 3
+    n_rows = max(1, int(np.ceil(len(factors) / n_cols)))
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(14, 4 * n_rows), squeeze=False)
+    
+    for ax, factor in zip(axes.flat, factors):
+        means = factor_means[factor].sort_values()
+        ax.bar(means.index.astype(str), means.values, color='#2563eb')
+        ax.axhline(pass_threshold, color='red', linestyle='--', linewidth=1)
+        ax.set_title(factor.replace('_', ' '))
+        ax.set_ylabel('Average JAMB Score')
+    
+    # Hide unused panels
+    for ax in list(axes.flat)[len(factors):]:
+        ax.axis('off')
+    
+    fig.suptitle('Average JAMB Score by Key Factor')
+    fig.tight_layout()
+
+def create_score_distribution_plot(cube):
+    """Render the score distribution image, reusing the cached PNG when possible"""
+    histogram = cube.histogram(bin_width=DISTRIBUTION_BIN_WIDTH)
+    # The threshold is part of the plotted data so the cached image follows it
+    return render_cached_plot('score_distribution', (histogram, PASS_THRESHOLD),
+                              draw_score_distribution, style=REPORT_STYLE)
+
+def create_factor_analysis_plot(cube):
+    """Render the factor analysis image, reusing the cached PNG when possible"""
+    factor_means = {
+        factor: cube.breakdown(factor)['mean']
+        for factor in KEY_FACTORS if factor in cube.dimensions
+    }
+    return render_cached_plot('factor_analysis', (factor_means, PASS_THRESHOLD),
+                              draw_factor_analysis, style=REPORT_STYLE)
+
+def classifier_version(model):
+    """Version string of the pass classifier used for at-risk scoring"""
+    return model_file_version("jamb_pass_classifier") if model is not None else "fallback"
+
+def identify_at_risk_students(data, model=None, top_n=10, segment_by=None):
+    """Rank students by predicted pass probability (stored per data and model version)"""
+    try:
+        return load_or_rank(data, model, classifier_version(model), segment_by=segment_by, k=top_n)
+    except Exception as e:
+        logger.error(f"Error scoring students with classifier: {e}")
+        return load_or_rank(data, None, "fallback", segment_by=segment_by, k=top_n)
+
+def format_at_risk_table(at_risk):
+    """Build the header and row HTML for the at-risk students table"""
+    columns = [col for col in AT_RISK_COLUMNS if col in at_risk.columns]
+    headers = "".join(f"<th>{escape(col.replace('_', ' '))}</th>" for col in columns)
+    
+    rows = []
+    for _, student in at_risk.iterrows():
+        cells = []
+        for col in columns:
+            value = student[col]
+            if col == 'Pass_Probability':
+                value = f"{value * 100:.1f}%"
+            elif isinstance(value, float):
+                value = f"{value:.1f}"
+            cells.append(f"<td>{escape(str(value))}</td>")
+        rows.append(f"<tr>{''.join(cells)}</tr>")
+    
+    return headers, "\n".join(rows)
+
+def generate_recommendations(cube, at_risk_count):
+    """Generate recommendations from the observed score gaps"""
+    recommendations = []
+    
+    comparisons = [
+        ('Extra_Tutorials', 'Yes', 'No', "Expand access to extra tutorials"),
+        ('Access_To_Learning_Materials', 'Yes', 'No', "Improve access to learning materials"),
+        ('Parent_Involvement', 'High', 'Low', "Encourage greater parental involvement")
+    ]
+    for factor, high, low, action in comparisons:
+        if factor not in cube.dimensions:
+            continue
+        means = cube.breakdown(factor)['mean']
+        if high in means.index and low in means.index:
+            gap = means[high] - means[low]
+            if gap > 5:
+                recommendations.append(
+                    f"{action}: students with {factor.replace('_', ' ').lower()} '{high}' "
+                    f"score {gap:.1f} points higher on average than '{low}'."
+                )
+    
+    if at_risk_count:
+        recommendations.append(
+            f"Provide targeted mentoring for the {at_risk_count} students identified as at risk of failing."
+        )
+    
+    if cube.summary()['pass_rate'] < 50:
+        recommendations.append("Introduce intensive remedial classes: fewer than half of students reach the pass mark.")
+    
+    return recommendations
+
+class ReportContext:
+    """Inputs shared by the section builders; the cube is only built if a section needs it"""
+    
+    def __init__(self, data, model=None, cube=None):
+        self.data = data
+        self.model = model
+        self._cube = cube
+    
+    @property
+    def cube(self):
+        if self._cube is None:
+            self._cube = load_or_build_cube(self.data)
+        return self._cube
+
+class ReportSection:
+    """One section of HTML_TEMPLATE with its declared data inputs
+    
+    build(context, upstream) returns the template variables of the section
+    (and an optional 'images' dict). The section is rebuilt only when the
+    hash of its input columns, its versions, its upstream sections or the
+    code of its builder and of the helpers it declares changes.
+    """
+    
+    def __init__(self, name, inputs, build, depends_on=(), versions=None, helpers=()):
+        self.name = name
+        self.inputs = inputs
+        self.build = build
+        self.depends_on = depends_on
+        self.versions = versions or (lambda context: [])
+        self.helpers = helpers
+    
+    def key(self, context, upstream_keys):
+        if self.inputs == '*':
+            columns = list(context.data.columns)
+        else:
+            columns = [col for col in self.inputs if col in context.data.columns]
+        return fingerprint(
+            self.name, context.data[columns], self.versions(context),
+            [upstream_keys[dep] for dep in self.depends_on],
+            [code_signature(func) for func in (self.build,) + tuple(self.helpers)]
+        )
+
+def build_summary_section(context, upstream):
+    summary = context.cube.summary()
+    return {
+        'avg_score': f"{summary['mean']:.1f}",
+        'pass_rate': f"{summary['pass_rate']:.1f}",
+        'top_performers': f"{summary['top_rate']:.1f}"
+    }
+
+def build_distribution_section(context, upstream):
+    return {'images': {'score_distribution': create_score_distribution_plot(context.cube)}}
+
+def build_factor_section(context, upstream):
+    return {'images': {'factor_analysis': create_factor_analysis_plot(context.cube)}}
+
+def build_at_risk_section(context, upstream):
+    ranking = identify_at_risk_students(context.data, context.model, top_n=AT_RISK_TOP_N)
+    at_risk_headers, at_risk_rows = format_at_risk_table(ranking.top())
+    return {
+        'at_risk_count': ranking.at_risk_count,
+        'at_risk_headers': at_risk_headers,
+        'at_risk_rows': at_risk_rows
+    }
+
+def build_recommendations_section(context, upstream):
+    return {'recommendations': generate_recommendations(context.cube, upstream['at_risk']['at_risk_count'])}
+
+# Cube queries the sections run; with cube_code_version() (thresholds and
+# build code) they decide what the cube hands to a section
+CUBE_QUERIES = (AggregateCube.summary, AggregateCube.breakdown, AggregateCube.histogram, AggregateCube._stats)
+
+# Sections in dependency order
+REPORT_SECTIONS = [
+    ReportSection('summary', ['JAMB_Score'], build_summary_section,
+                  versions=lambda context: [cube_code_version()],
+                  helpers=CUBE_QUERIES),
+    ReportSection('score_distribution', ['JAMB_Score'], build_distribution_section,
+                  versions=lambda context: [REPORT_STYLE, DISTRIBUTION_BIN_WIDTH, cube_code_version()],
+                  helpers=(create_score_distribution_plot, draw_score_distribution) + CUBE_QUERIES),
+    ReportSection('factor_analysis', KEY_FACTORS + ['JAMB_Score'], build_factor_section,
+                  versions=lambda context: [REPORT_STYLE, cube_code_version()],
+                  helpers=(create_factor_analysis_plot, draw_factor_analysis) + CUBE_QUERIES),
+    ReportSection('at_risk', '*', build_at_risk_section,
+                  versions=lambda context: [classifier_version(context.model), AT_RISK_COLUMNS,
+                                            AT_RISK_TOP_N, DEFAULT_RISK_THRESHOLD],
+                  helpers=(identify_at_risk_students, format_at_risk_table)),
+    ReportSection('recommendations',
+                  ['Extra_Tutorials', 'Access_To_Learning_Materials', 'Parent_Involvement', 'JAMB_Score'],
+                  build_recommendations_section, depends_on=('at_risk',),
+                  versions=lambda context: [cube_code_version()],
+                  helpers=(generate_recommendations,) + CUBE_QUERIES)
+]
+
+def render_sections(context, sections=REPORT_SECTIONS, cache_dir=REPORT_SECTIONS_DIR):
+    """Return the template variables of every section, rebuilding only changed sections"""
+    fragments = {}
+    keys = {}
+    rebuilt = []
+    
+    for section in sections:
+        keys[section.name] = section.key(context, keys)
+        path = os.path.join(cache_dir, f"{section.name}_{keys[section.name][:24]}.pkl")
+        
+        fragment = None
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    fragment = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable section fragment {path}: {e}")
+        
+        if fragment is None:
+            fragment = section.build(context, fragments)
+            atomic_write_bytes(path, pickle.dumps(fragment, protocol=pickle.HIGHEST_PROTOCOL))
+            rebuilt.append(section.name)
+        
+        fragments[section.name] = fragment
+    
+    # Fragments under keys no longer produced can never be reused
+    current = {f"{section.name}_{keys[section.name][:24]}.pkl" for section in sections}
+    prefixes = tuple(f"{section.name}_" for section in sections)
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.pkl') and entry.name.startswith(prefixes) and entry.name not in current:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    
+    logger.info(f"Report sections rebuilt: {rebuilt or 'none'}; "
+                f"reused: {[s.name for s in sections if s.name not in rebuilt] or 'none'}")
+    return fragments
+
+def generate_report(data, title="JAMB Performance Report", model=None, cube=None):
+    """Build the report HTML and the inline images it references"""
+    fragments = render_sections(ReportContext(data, model, cube))
+    
+    variables = {}
+    images = {}
+    for fragment in fragments.values():
+        fragment = dict(fragment)
+        images.update(fragment.pop('images', {}))
+        variables.update(fragment)
+    
+    generation_time = datetime.now()
+    html = Template(HTML_TEMPLATE).render(
+        title=title,
+        generation_time=generation_time.strftime("%Y-%m-%d %H:%M:%S"),
+        report_id=f"RPT-{generation_time.strftime('%Y%m%d%H%M%S')}",
+        **variables
+    )
+    
+    return html, images
+
+def save_report(html, images, name):
+    """Save the report HTML and its images to the reports directory"""
+    report_path = os.path.join(REPORTS_DIR, f"{name}.html")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    
+    for cid, payload in images.items():
+        with open(os.path.join(REPORTS_DIR, f"{name}_{cid}.png"), 'wb') as f:
+            f.write(payload)
+    
+    logger.info(f"Report saved to {report_path}")
+    return report_path
+
+def build_report_message(html, images, recipient, subject, sender=None):
+    """Build a MIME message with the report HTML and its inline images"""
+    message = MIMEMultipart('related')
+    message['Subject'] = subject
+    message['From'] = sender or SMTP_CONFIG['sender']
+    message['To'] = recipient
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain=message['From'].split('@')[-1])
+    message.attach(MIMEText(html, 'html', 'utf-8'))
+    
+    for cid, payload in images.items():
+        image = MIMEImage(payload, _subtype='png')
+        image.add_header('Content-ID', f"<{cid}>")
+        image.add_header('Content-Disposition', 'inline', filename=f"{cid}.png")
+        message.attach(image)
+    
+    return message
+
+def queue_report_emails(html, images, recipients, subject, report_key, spool=None):
+    """Spool one report message per recipient; already spooled recipients are skipped"""
+    spool = spool or MailSpool()
+    for recipient in recipients:
+        message = build_report_message(html, images, recipient, subject)
+        spool.enqueue(message, f"{report_key}:{recipient}")
+    logger.info(f"Queued report {report_key} for {len(recipients)} recipients")
+    return spool
+
+@profile_stage("report_generator")
+def main():
+    """Main function for report generation"""
+    # Record execution start time
+    start_time = datetime.now()
+    logger.info(f"Report generation started at: {start_time}")
+    
+    data = load_processed_data()
+    
+    if data is not None:
+        model = load_model("jamb_pass_classifier")
+        html, images = generate_report(data, model=model)
+        report_name = f"jamb_report_{start_time.strftime('%Y%m%d')}"
+        save_report(html, images, report_name)
+        
+        # Email the report when recipients are configured
+        recipients = [r.strip() for r in os.getenv("REPORT_RECIPIENTS", "").split(",") if r.strip()]
+        if recipients:
+            queue_report_emails(html, images, recipients, "JAMB Performance Report", report_name)
+            create_mailer().send_pending()
+    
+    # Record execution end time
+    end_time = datetime.now()
+    execution_time = end_time - start_time
+    logger.info(f"Report generation completed at: {end_time}")
+    logger.info(f"Total execution time: {execution_time}")
+
+if __name__ == "__main__":
+    main()
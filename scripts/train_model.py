@@ -24,6 +24,7 @@ from sklearn.model_selection import GridSearchCV
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config import PROCESSED_DATA_DIR, MODEL_DIR, MODEL_PARAMS
+from scripts.profiling import profile_stage
 
 # Set up logging
 logging.basicConfig(
@@ -240,6 +241,7 @@ def save_model(model, model_name):
     logger.info(f"Model saved to {model_path}")
     return model_path
 
+@profile_stage("train_model")
 def main():
     """Main function for model training"""
     # Record execution start time
@@ -0,0 +1,38 @@
+# tests/test_aggregates.py
+#
+# Building the aggregate cube from the memory-mapped columnar data the
+# dashboard serves with SHARED_DATA=1, where text columns are categoricals.
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.aggregates import AggregateCube, MISSING_CATEGORY
+from dashboard.shared_data import export_columnar, load_columnar
+
+def make_data():
+    return pd.DataFrame({
+        'School_Type': ['Public', 'Private', None, 'Public'],
+        'School_Location': ['Urban', 'Rural', 'Urban', np.nan],
+        'Study_Hours_Per_Week': [10.0, 20.0, 15.0, 5.0],
+        'JAMB_Score': [180.0, 260.0, 220.0, 150.0]
+    })
+
+def test_cube_from_columnar_data_with_missing_categories(tmp_path):
+    export_columnar(make_data(), str(tmp_path))
+    data = load_columnar(str(tmp_path))
+    assert isinstance(data['School_Type'].dtype, pd.CategoricalDtype)
+
+    cube = AggregateCube.build(data, dimensions=['School_Type', 'School_Location'])
+    assert cube.summary()['count'] == 4
+    assert cube.summary(School_Type=MISSING_CATEGORY)['count'] == 1
+    assert cube.summary(School_Location=MISSING_CATEGORY)['count'] == 1
+    assert cube.summary(School_Type='Public')['pass_rate'] == 0
+
+def test_cube_matches_the_csv_data(tmp_path):
+    export_columnar(make_data(), str(tmp_path))
+    shared = AggregateCube.build(load_columnar(str(tmp_path)), dimensions=['School_Type', 'School_Location'])
+    direct = AggregateCube.build(make_data(), dimensions=['School_Type', 'School_Location'])
+    pd.testing.assert_frame_equal(shared.cells, direct.cells)
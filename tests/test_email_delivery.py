@@ -0,0 +1,133 @@
+# tests/test_email_delivery.py
+#
+# State transitions of the email spool: pending -> inflight -> sent/failed,
+# retries of transient errors, and lease-based recovery of in-flight messages.
+import os
+import sys
+import time
+import smtplib
+from contextlib import contextmanager
+from email.message import EmailMessage
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.email_delivery import MailSpool, BulkMailer
+
+class FakePool:
+    """Stands in for SMTPConnectionPool; raises the queued errors before sending"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def send_message(self, message):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(message['To'])
+
+    def close_all(self):
+        pass
+
+def make_message(to):
+    message = EmailMessage()
+    message['From'] = "reports@example.com"
+    message['To'] = to
+    message['Subject'] = "Report"
+    message.set_content("Report attached")
+    return message
+
+def states(spool, name):
+    return [state for state in MailSpool.STATES if os.path.exists(spool._path(state, name))]
+
+@pytest.fixture
+def spool(tmp_path):
+    return MailSpool(str(tmp_path), lease=60)
+
+def test_enqueue_is_pending_and_deduplicated(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    assert spool.enqueue(make_message("a@example.com"), "report-a") == name
+    assert spool.pending() == [name]
+    assert states(spool, name) == ['pending']
+
+def test_delivered_message_is_sent_and_not_requeued(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    pool = FakePool()
+    assert BulkMailer(spool, pool, backoff=0).send_pending() == {'sent': 1, 'failed': 0, 'skipped': 0}
+    assert pool.sent == ["a@example.com"]
+    assert states(spool, name) == ['sent']
+
+    spool.enqueue(make_message("a@example.com"), "report-a")
+    assert spool.pending() == []
+
+def test_permanent_failure_is_failed_with_error(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    refused = smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no such user")})
+    results = BulkMailer(spool, FakePool([refused]), backoff=0).send_pending()
+    assert results['failed'] == 1
+    assert states(spool, name) == ['failed']
+    assert os.path.exists(spool._path('failed', name + ".error"))
+
+def test_greylisted_recipient_is_retried(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    greylisted = smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"greylisted, try again later")})
+    pool = FakePool([greylisted])
+    assert BulkMailer(spool, pool, backoff=0).send_pending()['sent'] == 1
+    assert pool.sent == ["a@example.com"]
+    assert states(spool, name) == ['sent']
+
+def test_sender_refusal_follows_the_reply_code(spool):
+    retried = spool.enqueue(make_message("a@example.com"), "report-a")
+    pool = FakePool([smtplib.SMTPSenderRefused(451, b"try again later", "reports@example.com")])
+    assert BulkMailer(spool, pool, backoff=0).send_pending()['sent'] == 1
+    assert states(spool, retried) == ['sent']
+
+    refused = spool.enqueue(make_message("b@example.com"), "report-b")
+    pool = FakePool([smtplib.SMTPSenderRefused(553, b"sender not allowed", "reports@example.com")])
+    assert BulkMailer(spool, pool, backoff=0).send_pending()['failed'] == 1
+    assert states(spool, refused) == ['failed']
+
+def test_transient_failure_is_retried(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    pool = FakePool([smtplib.SMTPServerDisconnected("gone"), smtplib.SMTPResponseException(421, b"busy")])
+    assert BulkMailer(spool, pool, max_retries=3, backoff=0).send_pending()['sent'] == 1
+    assert states(spool, name) == ['sent']
+
+def test_retries_exhausted_is_failed(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    pool = FakePool([smtplib.SMTPServerDisconnected("gone")] * 3)
+    assert BulkMailer(spool, pool, max_retries=2, backoff=0).send_pending()['failed'] == 1
+    assert pool.sent == []
+    assert states(spool, name) == ['failed']
+
+def test_claim_is_exclusive(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    assert spool.claim(name)
+    assert not spool.claim(name)
+    assert states(spool, name) == ['inflight']
+
+def test_recover_leaves_leased_messages_alone(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    spool.claim(name)
+    assert spool.recover() == 0
+    assert states(spool, name) == ['inflight']
+
+    pool = FakePool()
+    BulkMailer(spool, pool, backoff=0).send_pending()
+    assert pool.sent == []
+
+def test_recover_requeues_expired_leases(spool):
+    name = spool.enqueue(make_message("a@example.com"), "report-a")
+    spool.claim(name)
+    expired = time.time() - spool.lease - 1
+    os.utime(spool._path('inflight', name), (expired, expired))
+    assert spool.recover() == 1
+    assert states(spool, name) == ['pending']
+
+    pool = FakePool()
+    assert BulkMailer(spool, pool, backoff=0).send_pending()['sent'] == 1
+    assert pool.sent == ["a@example.com"]
@@ -0,0 +1,85 @@
+# tests/test_jobs.py
+#
+# Background jobs: submitting the same inputs again, with a new n_clicks
+# and filename, joins the running job or reuses its result.
+import os
+import sys
+import json
+import time
+
+import pytest
+
+pytest.importorskip("diskcache")
+pytest.importorskip("multiprocess")
+import dash
+from dash import html, Input, Output, State
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.jobs import NO_JOB, create_background_manager, background_callback
+
+def make_app(tmp_path):
+    runs = tmp_path / "runs.txt"
+    manager = create_background_manager(cache_by=[lambda: "model-1"], cache_dir=str(tmp_path / "jobs"))
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id="go"), html.Div(id="contents"), html.Div(id="name"),
+                           html.Div(id="out"), html.Div(id="progress")])
+
+    @background_callback(app, manager, Output("out", "children"), Input("go", "n_clicks"),
+                         State("contents", "children"), State("name", "children"),
+                         progress=[Output("progress", "children")], cache_args_to_ignore=[0, 2],
+                         prevent_initial_call=True)
+    def score(set_progress, n_clicks, contents, filename):
+        with open(runs, "a") as f:
+            f.write(f"{contents}\n")
+        time.sleep(1)
+        return contents.upper()
+
+    return app, runs
+
+def submit(client, n_clicks, contents, filename):
+    body = {"output": "out.children", "outputs": {"id": "out", "property": "children"},
+            "inputs": [{"id": "go", "property": "n_clicks", "value": n_clicks}],
+            "state": [{"id": "contents", "property": "children", "value": contents},
+                      {"id": "name", "property": "children", "value": filename}],
+            "changedPropIds": ["go.n_clicks"]}
+    response = client.post("/_dash-update-component", json=body)
+    assert response.status_code == 200
+    return json.loads(response.data)
+
+def wait_for_runs(runs, count, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if runs.exists() and len(runs.read_text().splitlines()) >= count:
+            break
+        time.sleep(0.1)
+    time.sleep(1.5)
+    return runs.read_text().splitlines() if runs.exists() else []
+
+def test_same_contents_share_one_job(tmp_path):
+    app, runs = make_app(tmp_path)
+    client = app.server.test_client()
+    # Background callbacks are registered with the manager on the first request
+    client.get("/")
+    first = submit(client, 1, "class a", "a.csv")
+    # While the first job is still running
+    second = submit(client, 2, "class a", "renamed.csv")
+    assert wait_for_runs(runs, 1) == ["class a"]
+
+    # After it finished the result is reused without a job
+    third = submit(client, 3, "class a", "a.csv")
+    assert wait_for_runs(runs, 1) == ["class a"]
+    assert "job" in first and "job" in second and "job" in third
+
+def test_different_contents_run_their_own_job(tmp_path):
+    app, runs = make_app(tmp_path)
+    client = app.server.test_client()
+    client.get("/")
+    submit(client, 1, "class a", "a.csv")
+    submit(client, 1, "class b", "a.csv")
+    assert sorted(wait_for_runs(runs, 2)) == ["class a", "class b"]
+
+def test_finished_result_is_reused_without_a_process(tmp_path):
+    manager = create_background_manager(cache_by=[lambda: "model-1"], cache_dir=str(tmp_path / "jobs"))
+    manager.handle.set("key", "result")
+    assert manager.call_job_fn("key", None, [], {}) == NO_JOB
+    assert not manager.job_running(NO_JOB)
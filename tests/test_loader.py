@@ -0,0 +1,56 @@
+# tests/test_loader.py
+#
+# Hot reload in ResourceManager: a failed reload keeps the version being
+# served and is retried, and the fallbacks are only used on the first load.
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.loader import ResourceManager, load_data, load_models, path_signature
+
+def read_number(path):
+    with open(path) as f:
+        return int(f.read())
+
+def write(path, text, mtime):
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, (mtime, mtime))
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / "value.txt")
+    write(path, "1", 1_000_000)
+    resources = ResourceManager(timeout=5)
+    resources.register("value", lambda loaded: read_number(path), default=None, watch=path)
+    resources.register("double", lambda loaded: loaded["value"] * 2, default=None, depends_on=("value",))
+    resources.start()
+    resources.wait_all()
+    return resources, path
+
+def test_reload_swaps_in_new_value(manager):
+    resources, path = manager
+    write(path, "2", 2_000_000)
+    assert resources.reload(["value"]) == {"value", "double"}
+    assert resources.get("double") == 4
+    assert resources.version("value") == path_signature(path)
+
+def test_failed_reload_keeps_served_version(manager):
+    resources, path = manager
+    served = resources.version("value")
+    write(path, "not a number", 2_000_000)
+    assert resources.reload(["value"]) == set()
+    assert resources.get("value") == 1
+    assert resources.get("double") == 2
+    # Not recorded as loaded, so the watcher tries again
+    assert resources.version("value") == served != path_signature(path)
+
+def test_fallbacks_only_on_first_load(tmp_path):
+    assert not load_data(str(tmp_path), shared=False).empty
+    assert load_models(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        load_data(str(tmp_path), shared=False, fallback=False)
+    with pytest.raises(FileNotFoundError):
+        load_models(str(tmp_path), fallback=False)
@@ -0,0 +1,38 @@
+# tests/test_plot_cache.py
+#
+# The plot cache reuses rendered images and evicts the least recently used.
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.plot_cache import PlotCache
+
+def draw_line(values):
+    plt.figure(figsize=(2, 2))
+    plt.plot(values)
+
+def stored(cache):
+    return sorted(os.path.basename(path) for _, path in cache._entries())
+
+def test_render_reuses_stored_image(tmp_path):
+    cache = PlotCache(str(tmp_path), max_entries=4)
+    first = cache.render('line', [1, 2, 3], draw_line)
+    assert cache.render('line', [1, 2, 3], draw_line) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_images_are_evicted(tmp_path):
+    cache = PlotCache(str(tmp_path), max_entries=2)
+    keys = [cache.make_key('line', [i], draw_line) for i in range(3)]
+    cache.render('line', [0], draw_line)
+    cache.render('line', [1], draw_line)
+    # Age both entries, then use the first again so the second is the oldest
+    for key in keys[:2]:
+        os.utime(cache._path(key, 'png'), (1_000_000, 1_000_000))
+    cache.render('line', [0], draw_line)
+
+    cache.render('line', [2], draw_line)
+    assert stored(cache) == sorted([f"{keys[0]}.png", f"{keys[2]}.png"])
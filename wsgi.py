@@ -2,4 +2,7 @@
 from dashboard.app import server as application
 
 if __name__ == "__main__":
+    from dashboard.app import resources
+    from dashboard.loader import RELOAD_INTERVAL
+    resources.watch(RELOAD_INTERVAL)
     application.run()